@@ -41,6 +41,7 @@ def create_app(config_name='default'):
     from app.routes.analytics import analytics_bp
     from app.routes.api import api_bp
     from app.routes.billing import billing_bp
+    from app.routes.uploads import uploads_bp
     
     app.register_blueprint(auth_bp)
     app.register_blueprint(dashboard_bp)
@@ -50,6 +51,19 @@ def create_app(config_name='default'):
     app.register_blueprint(analytics_bp)
     app.register_blueprint(api_bp)
     app.register_blueprint(billing_bp)
+    app.register_blueprint(uploads_bp)
+    
+    # Shared Graph API connection pool settings
+    from app.services.facebook_service import facebook_service
+    facebook_service.init_app(app)
+    
+    # Anthropic client settings (the SDK is imported on first AI call)
+    from app.services.ai_service import ai_service
+    ai_service.init_app(app)
+    
+    # Background jobs (portfolio text extraction, media processing)
+    from app.services.task_queue import task_queue
+    task_queue.init_app(app)
     
     # ❌ REMOVE THIS — it prevents migrations
     # with app.app_context():
@@ -3,8 +3,17 @@ from app.models.portfolio import Portfolio
 from app.models.media import Media
 from app.models.post import Post
 from app.models.scheduled_post import ScheduledPost
-from app.models.analytics import PostAnalytics
+from app.models.analytics import PostAnalytics, DailyEngagement, HourlyEngagement
 from app.models.plan import Plan, Subscription, Invoice, Payment, PaymentMethod
+from app.models.blob import Blob
+from app.models.upload_session import UploadSession
+from app.models.usage import UsageCounter
+from app.models.facebook_page import FacebookPage
+from app.models.post_publication import PostPublication
+from app.models.ai_cache import CachedAIResponse
+from app.models.portfolio_chunk import PortfolioChunk
 
-__all__ = ['User', 'Portfolio', 'Media', 'Post', 'ScheduledPost', 'PostAnalytics', 
-           'Plan', 'Subscription', 'Invoice', 'Payment', 'PaymentMethod']
+__all__ = ['User', 'Portfolio', 'Media', 'Post', 'ScheduledPost', 'PostAnalytics',
+           'DailyEngagement', 'HourlyEngagement', 'Plan', 'Subscription', 'Invoice', 'Payment', 'PaymentMethod',
+           'Blob', 'UploadSession', 'UsageCounter', 'FacebookPage',
+           'PostPublication', 'CachedAIResponse', 'PortfolioChunk']
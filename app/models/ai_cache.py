@@ -0,0 +1,19 @@
+from app import db
+from datetime import datetime
+
+class CachedAIResponse(db.Model):
+    """Stored response of a deterministic AIService call (see app/services/ai_cache.py)"""
+    __tablename__ = 'ai_response_cache'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    cache_key = db.Column(db.String(64), unique=True, nullable=False)  # sha256 of method, model, normalized prompt
+    
+    method = db.Column(db.String(50), nullable=False)  # improve_post, suggest_hashtags, generate_auto_caption
+    model = db.Column(db.String(100), nullable=False)
+    response = db.Column(db.Text, nullable=False)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<CachedAIResponse {self.method} {self.cache_key[:12]}>'
@@ -66,3 +66,58 @@ class PostAnalytics(db.Model):
         # Normalize to 0-100
         self.performance_score = min(base_score * 10, 100)
         return self.performance_score
+
+
+class DailyEngagement(db.Model):
+    """
+    Per-user engagement rollup keyed on the day posts were published.
+    
+    Maintained incrementally by the analytics sync and rebuilt by
+    rebuild_rollups(); a row is not engagement received on that day.
+    """
+    __tablename__ = 'daily_engagement'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    date = db.Column(db.Date, nullable=False)
+    
+    # Current engagement of posts published on this day (UTC, posted_at or created_at);
+    # syncs add each post's metric deltas to its publish day, whenever they arrive
+    likes = db.Column(db.Integer, default=0, nullable=False)
+    comments = db.Column(db.Integer, default=0, nullable=False)
+    shares = db.Column(db.Integer, default=0, nullable=False)
+    reach = db.Column(db.Integer, default=0, nullable=False)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'date', name='uq_daily_engagement_user_date'),
+    )
+    
+    def __repr__(self):
+        return f'<DailyEngagement user_id={self.user_id} date={self.date}>'
+
+
+class HourlyEngagement(db.Model):
+    """Per-user engagement totals bucketed by the hour of day posts were published"""
+    __tablename__ = 'hourly_engagement'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    hour = db.Column(db.Integer, nullable=False)  # 0-23 (UTC)
+    
+    posts = db.Column(db.Integer, default=0, nullable=False)  # Posts with synced analytics
+    engagement = db.Column(db.Integer, default=0, nullable=False)  # likes + comments + shares
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'hour', name='uq_hourly_engagement_user_hour'),
+    )
+    
+    def __repr__(self):
+        return f'<HourlyEngagement user_id={self.user_id} hour={self.hour}>'
+    
+    @property
+    def avg_engagement(self):
+        return self.engagement / self.posts if self.posts else 0.0
@@ -0,0 +1,20 @@
+from app import db
+from datetime import datetime
+
+class Blob(db.Model):
+    """Content-addressed upload stored once on disk and shared by Media/Portfolio rows"""
+    __tablename__ = 'blobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), unique=True, nullable=False, index=True)  # SHA-256 hex
+    file_path = db.Column(db.String(500), nullable=False)
+    file_size = db.Column(db.BigInteger)  # in bytes
+    
+    # Number of Media/Portfolio rows pointing at this file
+    ref_count = db.Column(db.Integer, default=0, nullable=False)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<Blob {self.content_hash[:12]} refs={self.ref_count}>'
@@ -0,0 +1,25 @@
+from app import db
+from datetime import datetime
+
+class FacebookPage(db.Model):
+    """A Facebook page the user manages (one row per page from /me/accounts)"""
+    __tablename__ = 'facebook_pages'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'page_id', name='uq_facebook_pages_user_page'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    
+    page_id = db.Column(db.String(255), nullable=False)  # Facebook page ID
+    name = db.Column(db.String(255))
+    picture_url = db.Column(db.String(500))
+    
+    # Page access token; deferred so page lists never load it
+    access_token = db.deferred(db.Column(db.Text))
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<FacebookPage {self.page_id} {self.name}>'
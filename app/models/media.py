@@ -4,6 +4,11 @@ from datetime import datetime
 class Media(db.Model):
     """Media library for images and videos"""
     __tablename__ = 'media'
+    __table_args__ = (
+        # Media library / picker pages: newest first, optionally per type
+        db.Index('ix_media_user_created', 'user_id', 'created_at'),
+        db.Index('ix_media_user_type_created', 'user_id', 'media_type', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
@@ -13,6 +18,7 @@ class Media(db.Model):
     media_type = db.Column(db.String(50), nullable=False)  # image, video
     file_extension = db.Column(db.String(10))
     file_size = db.Column(db.Integer)  # in bytes
+    content_hash = db.Column(db.String(64), index=True)  # SHA-256 of the stored Blob
     
     # Media metadata
     title = db.Column(db.String(255))
@@ -22,6 +28,10 @@ class Media(db.Model):
     # Thumbnail for images/videos
     thumbnail_path = db.Column(db.String(500))
     
+    # Resized copies generated after upload: {'thumb': path, 'preview': path, ...}
+    derivatives = db.Column(db.JSON)
+    processing_status = db.Column(db.String(50), default='pending')  # pending, processing, ready, failed
+    
     # Media info
     width = db.Column(db.Integer)
     height = db.Column(db.Integer)
@@ -33,6 +43,10 @@ class Media(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    def derivative_path(self, name):
+        """Path of a generated size, falling back to the original file"""
+        return (self.derivatives or {}).get(name) or self.file_path
+    
     def __repr__(self):
         return f'<Media {self.filename}>'
 
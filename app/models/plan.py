@@ -69,6 +69,9 @@ class Plan(db.Model):
 class Subscription(db.Model):
     """User subscriptions to plans"""
     __tablename__ = 'subscriptions'
+    __table_args__ = (
+        db.Index('ix_subscriptions_user_status', 'user_id', 'status'),  # A user's active subscription
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
@@ -131,6 +134,28 @@ class Subscription(db.Model):
         return 0
 
 
+
+@db.event.listens_for(Subscription.status, 'set')
+def _subscription_status_changed(target, value, oldvalue, initiator):
+    """Drop cached plans and any loaded owner's entitlements when a subscription changes state"""
+    if value == oldvalue:
+        return
+    
+    from app.models.user import User
+    from app.services.plan_catalog import plan_catalog
+    plan_catalog.invalidate()
+    
+    session = db.object_session(target)
+    users = [user for user in session.identity_map.values() if isinstance(user, User)] if session else []
+    owner = target.__dict__.get('user')  # Only if already loaded
+    if owner is not None:
+        users.append(owner)
+    
+    for user in users:
+        # Unloaded/expired ids are not fetched here; those users are simply reset too
+        if user is owner or user.__dict__.get('current_subscription_id', target.id) == target.id:
+            user.reset_entitlements()
+
 class Invoice(db.Model):
     """Billing invoices"""
     __tablename__ = 'invoices'
@@ -12,6 +12,7 @@ class Portfolio(db.Model):
     file_path = db.Column(db.String(500), nullable=False)
     file_type = db.Column(db.String(50), nullable=False)  # pdf, docx, image, etc.
     file_size = db.Column(db.Integer)  # in bytes
+    content_hash = db.Column(db.String(64), index=True)  # SHA-256 of the stored Blob
     
     title = db.Column(db.String(255))
     description = db.Column(db.Text)
@@ -26,6 +27,8 @@ class Portfolio(db.Model):
     
     # Relationships
     posts = db.relationship('Post', backref='source_portfolio', lazy='dynamic')
+    chunks = db.relationship('PortfolioChunk', backref='portfolio', lazy='dynamic',
+                             cascade='all, delete-orphan', order_by='PortfolioChunk.position')
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,21 @@
+from app import db
+from datetime import datetime
+
+class PortfolioChunk(db.Model):
+    """A passage of a portfolio's extracted text with its term vector (see app/services/portfolio_index.py)"""
+    __tablename__ = 'portfolio_chunks'
+    __table_args__ = (
+        db.UniqueConstraint('portfolio_id', 'position', name='uq_portfolio_chunks_portfolio_position'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    portfolio_id = db.Column(db.Integer, db.ForeignKey('portfolios.id'), nullable=False, index=True)
+    
+    position = db.Column(db.Integer, nullable=False)  # Order within the document, from 0
+    content = db.Column(db.Text, nullable=False)
+    terms = db.Column(db.JSON, nullable=False)  # {term: weight}, top TF-IDF terms, L2-normalized
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<PortfolioChunk {self.portfolio_id}:{self.position}>'
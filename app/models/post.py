@@ -4,6 +4,11 @@ from datetime import datetime
 class Post(db.Model):
     """Social media posts (AI-generated or manual)"""
     __tablename__ = 'posts'
+    __table_args__ = (
+        # Post list / dashboard: a user's posts newest first, optionally per status
+        db.Index('ix_posts_user_created', 'user_id', 'created_at'),
+        db.Index('ix_posts_user_status_created', 'user_id', 'status', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
@@ -51,6 +56,7 @@ class Post(db.Model):
     # Relationships
     analytics = db.relationship('PostAnalytics', backref='post', lazy='dynamic', cascade='all, delete-orphan')
     scheduled_posts = db.relationship('ScheduledPost', backref='post', lazy='dynamic', cascade='all, delete-orphan')
+    publications = db.relationship('PostPublication', backref='post', lazy='dynamic', cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<Post {self.id} - {self.status}>'
@@ -0,0 +1,32 @@
+from app import db
+from datetime import datetime
+
+class PostPublication(db.Model):
+    """Outcome of publishing one Post to one Facebook page (multi-page fan-out)"""
+    __tablename__ = 'post_publications'
+    __table_args__ = (
+        db.UniqueConstraint('post_id', 'page_id', name='uq_post_publications_post_page'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    post_id = db.Column(db.Integer, db.ForeignKey('posts.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    
+    # Target page
+    page_id = db.Column(db.String(255), nullable=False)  # Facebook page ID
+    page_name = db.Column(db.String(255))
+    
+    # Result
+    status = db.Column(db.String(50), default='pending', nullable=False)
+    # pending, publishing, published, failed
+    facebook_post_id = db.Column(db.String(255))
+    facebook_url = db.Column(db.String(500))
+    error_message = db.Column(db.Text)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    published_at = db.Column(db.DateTime)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<PostPublication {self.post_id} -> {self.page_id} - {self.status}>'
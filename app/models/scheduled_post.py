@@ -4,6 +4,12 @@ from datetime import datetime
 class ScheduledPost(db.Model):
     """Scheduled posts for automatic publishing"""
     __tablename__ = 'scheduled_posts'
+    __table_args__ = (
+        # Dashboard "upcoming" list and per-user status counts
+        db.Index('ix_scheduled_posts_user_status_scheduled', 'user_id', 'publish_status', 'scheduled_at'),
+        # Publisher worker: due rows across all users
+        db.Index('ix_scheduled_posts_status_scheduled', 'publish_status', 'scheduled_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
@@ -12,7 +18,7 @@ class ScheduledPost(db.Model):
     # Scheduling
     scheduled_at = db.Column(db.DateTime, nullable=False, index=True)
     publish_status = db.Column(db.String(50), default='scheduled', nullable=False)
-    # scheduled, published, failed, cancelled
+    # scheduled, publishing (claimed by a worker), published, failed, cancelled
     
     # Publishing info
     published_at = db.Column(db.DateTime)
@@ -0,0 +1,33 @@
+from app import db
+from datetime import datetime
+
+class UploadSession(db.Model):
+    """Chunked, resumable upload in progress (see app/services/upload_service.py)"""
+    __tablename__ = 'upload_sessions'
+    
+    id = db.Column(db.String(32), primary_key=True)  # Random token used in upload URLs
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    
+    target = db.Column(db.String(50), nullable=False)  # media, portfolio
+    filename = db.Column(db.String(255), nullable=False)
+    title = db.Column(db.String(255))
+    description = db.Column(db.Text)
+    
+    # Progress
+    total_size = db.Column(db.BigInteger, nullable=False)  # in bytes
+    received_size = db.Column(db.BigInteger, default=0, nullable=False)  # bytes written so far
+    status = db.Column(db.String(50), default='uploading', nullable=False)  # uploading, completed, failed
+    
+    # Result once completed
+    record_id = db.Column(db.Integer)  # Media.id or Portfolio.id
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    @property
+    def is_complete(self):
+        return self.received_size >= self.total_size
+    
+    def __repr__(self):
+        return f'<UploadSession {self.id} {self.received_size}/{self.total_size}>'
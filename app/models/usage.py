@@ -0,0 +1,21 @@
+from app import db
+from datetime import datetime
+
+class UsageCounter(db.Model):
+    """Per-user usage of a plan limit (a Plan.features key) for one period"""
+    __tablename__ = 'usage_counters'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'metric', 'period', name='uq_usage_counters_user_metric_period'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    
+    metric = db.Column(db.String(50), nullable=False)  # posts_per_month, scheduled_posts, media_storage_gb, ai_captions_per_month
+    period = db.Column(db.String(7), nullable=False)  # YYYY-MM for monthly limits, 'total' for running totals
+    used = db.Column(db.BigInteger, default=0, nullable=False)  # count, or bytes for media_storage_gb
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<UsageCounter {self.user_id} {self.metric} {self.period}={self.used}>'
@@ -23,7 +23,6 @@ class User(UserMixin, db.Model):
     
     # Business account info
     facebook_business_accounts = db.Column(db.JSON, default=list)
-    facebook_pages = db.Column(db.JSON, default=list)
     selected_business_account_id = db.Column(db.String(255))
     selected_page_id = db.Column(db.String(255))
     selected_page_name = db.Column(db.String(255))
@@ -65,11 +64,22 @@ class User(UserMixin, db.Model):
     analytics = db.relationship(
         'PostAnalytics', backref='user', lazy='dynamic', cascade='all, delete-orphan'
     )
+    facebook_pages = db.relationship(
+        'FacebookPage', backref='user', lazy='dynamic', cascade='all, delete-orphan',
+        order_by='FacebookPage.name'
+    )
     
     # Subscription relationships
     plan = db.relationship('Plan', backref='users')
     current_subscription = db.relationship('Subscription', foreign_keys=[current_subscription_id], uselist=False)
     
+    _entitlements = None  # Per-instance memo, see entitlements
+    
+    # Large token/JSON columns most requests never touch; the request principal
+    # (see load_user) loads them on first access
+    PRINCIPAL_DEFERRED = ('access_token', 'refresh_token', 'page_access_token',
+                          'facebook_business_accounts')
+    
     def __repr__(self):
         return f'<User {self.email}>'
     
@@ -81,27 +91,74 @@ class User(UserMixin, db.Model):
     def get_id(self):
         return str(self.id)
     
+    @property
+    def entitlements(self):
+        """Plan/feature resolution, computed once per loaded User (i.e. once per request)"""
+        if self._entitlements is None:
+            self._entitlements = Entitlements.for_user(self)
+        return self._entitlements
+    
+    def reset_entitlements(self):
+        self._entitlements = None
+    
     def get_current_plan(self):
-        if self.current_subscription and self.current_subscription.is_active():
-            return self.current_subscription.plan
-        from app.models.plan import Plan
-        return Plan.query.filter_by(name='free').first()
+        return self.entitlements.plan
     
     def has_feature(self, feature_name):
-        plan = self.get_current_plan()
-        if plan:
-            return plan.get_feature(feature_name)
-        return None
+        return self.entitlements.get(feature_name)
     
     def is_on_free_plan(self):
-        plan = self.get_current_plan()
-        return plan and plan.name == 'free'
+        return self.entitlements.is_free
     
     def is_paid_subscriber(self):
-        if self.current_subscription:
-            return self.current_subscription.is_active() and self.current_subscription.plan.name != 'free'
-        return False
+        return self.entitlements.is_paid
+
+
+class Entitlements:
+    """Snapshot of a user's plan and feature limits"""
+    
+    def __init__(self, plan, subscription_active):
+        self.plan = plan
+        self.features = dict(plan.features or {}) if plan else {}
+        self.is_free = bool(plan and plan.name == 'free')
+        self.is_paid = bool(subscription_active and plan and plan.name != 'free')
+    
+    @classmethod
+    def for_user(cls, user):
+        from app.services.plan_catalog import plan_catalog
+        
+        subscription = user.current_subscription
+        if subscription and subscription.is_active():
+            return cls(plan_catalog.get(subscription.plan_id), True)
+        return cls(plan_catalog.get_by_name('free'), False)
+    
+    def get(self, feature_name):
+        return self.features.get(feature_name)
+    
+    def limit(self, feature_name):
+        """A numeric feature limit, or None when unlimited (missing, None or negative, e.g. -1)"""
+        value = self.features.get(feature_name)
+        if value is None or value < 0:
+            return None
+        return value
+
+
+@db.event.listens_for(User.current_subscription_id, 'set')
+@db.event.listens_for(User.current_subscription, 'set')
+def _subscription_switched(target, value, oldvalue, initiator):
+    target.reset_entitlements()
+
+
+@db.event.listens_for(User, 'after_update')
+@db.event.listens_for(User, 'after_delete')
+def _user_changed(mapper, connection, target):
+    from app.services.principal_cache import principal_cache
+    
+    principal_cache.invalidate(target.id)
+
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    from app.services.principal_cache import principal_cache
+    
+    return principal_cache.get(int(user_id))
@@ -1,7 +1,8 @@
 from flask import Blueprint, render_template, jsonify
 from flask_login import login_required, current_user
-from app.models import Post, PostAnalytics, ScheduledPost
+from app.models import Post, PostAnalytics, ScheduledPost, HourlyEngagement
 from app import db
+from app.services.analytics_service import analytics_service
 from datetime import datetime, timedelta
 
 analytics_bp = Blueprint('analytics', __name__, url_prefix='/analytics')
@@ -10,37 +11,29 @@ analytics_bp = Blueprint('analytics', __name__, url_prefix='/analytics')
 @login_required
 def index():
     """Analytics dashboard"""
-    # Get all posts with analytics
-    posts_with_analytics = db.session.query(Post, PostAnalytics).outerjoin(
-        PostAnalytics, Post.id == PostAnalytics.post_id
-    ).filter(Post.user_id == current_user.id, Post.status == 'posted').all()
-    
-    # Calculate overall stats
+    # Overall stats from the daily rollup
+    totals = analytics_service.get_totals(current_user.id)
     total_engagement = {
-        'likes': 0,
-        'comments': 0,
-        'shares': 0,
-        'reaches': 0
+        'likes': totals['likes'],
+        'comments': totals['comments'],
+        'shares': totals['shares'],
+        'reaches': totals['reach']
     }
     
-    top_posts = []
-    
-    for post, analytics in posts_with_analytics:
-        if analytics:
-            total_engagement['likes'] += analytics.likes or 0
-            total_engagement['comments'] += analytics.comments or 0
-            total_engagement['shares'] += analytics.shares or 0
-            total_engagement['reaches'] += analytics.reach or 0
-            
-            top_posts.append({
-                'post': post,
-                'analytics': analytics,
-                'total_engagement': (analytics.likes or 0) + (analytics.comments or 0) + (analytics.shares or 0)
-            })
+    # Top 10 posts by engagement, sorted and limited in the database
+    engagement = (db.func.coalesce(PostAnalytics.likes, 0) +
+                  db.func.coalesce(PostAnalytics.comments, 0) +
+                  db.func.coalesce(PostAnalytics.shares, 0))
+    top_rows = db.session.query(Post, PostAnalytics, engagement).join(
+        PostAnalytics, Post.id == PostAnalytics.post_id
+    ).filter(Post.user_id == current_user.id, Post.status == 'posted').order_by(
+        engagement.desc()).limit(10).all()
     
-    # Sort by engagement
-    top_posts.sort(key=lambda x: x['total_engagement'], reverse=True)
-    top_posts = top_posts[:10]
+    top_posts = [{
+        'post': post,
+        'analytics': analytics,
+        'total_engagement': total
+    } for post, analytics, total in top_rows]
     
     # Get weekly stats
     seven_days_ago = datetime.utcnow() - timedelta(days=7)
@@ -51,22 +44,7 @@ def index():
     ).count()
     
     # Get engagement trend
-    daily_stats = db.session.query(
-        db.func.date(PostAnalytics.updated_at).label('date'),
-        db.func.sum(PostAnalytics.likes).label('likes'),
-        db.func.sum(PostAnalytics.comments).label('comments'),
-        db.func.sum(PostAnalytics.shares).label('shares')
-    ).filter(
-        PostAnalytics.user_id == current_user.id,
-        PostAnalytics.updated_at >= seven_days_ago
-    ).group_by(db.func.date(PostAnalytics.updated_at)).all()
-    
-    engagement_trend = {
-        'dates': [str(stat[0]) for stat in daily_stats],
-        'likes': [stat[1] or 0 for stat in daily_stats],
-        'comments': [stat[2] or 0 for stat in daily_stats],
-        'shares': [stat[3] or 0 for stat in daily_stats]
-    }
+    engagement_trend = analytics_service.get_daily_trend(current_user.id, days=7)
     
     return render_template('analytics/index.html',
                           total_engagement=total_engagement,
@@ -89,13 +67,9 @@ def get_performance():
         Post.user_id == current_user.id
     ).order_by((PostAnalytics.likes + PostAnalytics.comments + PostAnalytics.shares).desc()).limit(5).all()
     
-    # Best posting times
-    posting_time_stats = db.session.query(
-        db.func.hour(Post.posted_at).label('hour'),
-        db.func.avg(PostAnalytics.likes + PostAnalytics.comments + PostAnalytics.shares).label('avg_engagement')
-    ).join(PostAnalytics, Post.id == PostAnalytics.post_id).filter(
-        Post.user_id == current_user.id
-    ).group_by(db.func.hour(Post.posted_at)).all()
+    # Best posting times (hour-of-day rollup)
+    posting_time_stats = HourlyEngagement.query.filter_by(user_id=current_user.id).order_by(
+        HourlyEngagement.hour).all()
     
     return jsonify({
         'best_posts': [{
@@ -106,7 +80,8 @@ def get_performance():
             'shares': p[4] or 0
         } for p in best_posts],
         'best_hours': [{
-            'hour': h,
-            'avg_engagement': float(e or 0)
-        } for h, e in posting_time_stats]
+            'hour': stat.hour,
+            'avg_engagement': float(stat.avg_engagement)
+        } for stat in posting_time_stats],
+        'daily': analytics_service.get_daily_trend(current_user.id, days=30)
     })
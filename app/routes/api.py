@@ -2,32 +2,38 @@ from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
 from app.models import Media, Post, Portfolio
 from app import db
+from app.routes.media import media_urls
+from app.services.media_service import media_service
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
 @api_bp.route('/media/list')
 @login_required
 def get_media():
-    """Get media list"""
-    media_type = request.args.get('type', 'all')
+    """Get media list, newest first; pass ?cursor= from X-Next-Cursor for the next page"""
+    try:
+        media, next_cursor = media_service.list_media(
+            current_user.id,
+            media_type=request.args.get('type', 'all'),
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', 50, type=int)
+        )
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     
-    query = Media.query.filter_by(user_id=current_user.id)
-    
-    if media_type in ['image', 'video']:
-        query = query.filter_by(media_type=media_type)
-    
-    media = query.all()
-    
-    return jsonify([{
+    response = jsonify([{
         'id': m.id,
         'filename': m.filename,
         'media_type': m.media_type,
         'title': m.title,
-        'file_path': m.file_path,
-        'thumbnail_path': m.thumbnail_path or m.file_path,
+        **media_urls(m),
         'width': m.width,
-        'height': m.height
+        'height': m.height,
+        'duration': m.duration
     } for m in media])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
 
 @api_bp.route('/posts/<int:post_id>/preview')
 @login_required
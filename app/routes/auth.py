@@ -3,6 +3,7 @@ from flask_login import login_user, logout_user, login_required, current_user
 from app.models import User
 from app import db
 from app.services.facebook_service import facebook_service
+from app.services.page_service import page_service
 from datetime import datetime, timedelta
 import os
 
@@ -67,7 +68,6 @@ def facebook_callback():
         if user:
             # Update existing user
             user.access_token = access_token
-            user.facebook_pages = pages  # Store all available pages
             user.last_login = datetime.utcnow()
             if profile_picture:
                 user.profile_picture = profile_picture
@@ -79,11 +79,13 @@ def facebook_callback():
                 email=email,
                 name=name,
                 access_token=access_token,
-                facebook_pages=pages,
                 profile_picture=profile_picture
             )
             db.session.add(user)
+            db.session.flush()
         
+        # Store all available pages (only new or changed ones are written)
+        page_service.sync_pages(user, pages)
         db.session.commit()
 
         # Send account created webhook if this was a new user
@@ -121,7 +123,7 @@ def logout():
 @login_required
 def select_page():
     """Select a Facebook page to manage"""
-    pages = current_user.facebook_pages or []
+    pages = page_service.list_pages(current_user.id)
     return render_template('select_page.html', pages=pages)
 
 @auth_bp.route('/select-page', methods=['POST'])
@@ -136,20 +138,14 @@ def select_page_post():
     
     try:
         # Find the page in user's pages
-        pages = current_user.facebook_pages or []
-        selected_page = None
-        
-        for page in pages:
-            if page.get('id') == page_id:
-                selected_page = page
-                break
+        selected_page = page_service.get_page(current_user.id, page_id, with_token=True)
         
         if not selected_page:
             flash('Page not found', 'danger')
             return redirect(url_for('auth.select_page'))
         
         # Store the page token (from the pages list)
-        page_token = selected_page.get('access_token')
+        page_token = selected_page.access_token
         
         if not page_token:
             # Fallback: get page token if not in list
@@ -160,7 +156,7 @@ def select_page_post():
         
         # Save to user
         current_user.selected_page_id = page_id
-        current_user.selected_page_name = selected_page.get('name')
+        current_user.selected_page_name = selected_page.name
         current_user.page_access_token = page_token
         db.session.commit()
 
@@ -171,7 +167,7 @@ def select_page_post():
         except Exception as ex:
             current_app.logger.error(f"Failed sending page-selection webhook: {str(ex)}")
 
-        flash(f'Successfully selected page: {selected_page.get("name")}', 'success')
+        flash(f'Successfully selected page: {selected_page.name}', 'success')
         return redirect(url_for('dashboard.index'))
         
     except Exception as e:
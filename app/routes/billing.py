@@ -2,6 +2,7 @@ from flask import Blueprint, render_template, request, jsonify, session, redirec
 from flask_login import login_required, current_user
 from app.models import Plan, Subscription, Invoice
 from app.services.ecocash_service import ecocash_service
+from app.services.plan_catalog import plan_catalog
 from app import db
 
 billing_bp = Blueprint('billing', __name__, url_prefix='/billing')
@@ -11,7 +12,7 @@ billing_bp = Blueprint('billing', __name__, url_prefix='/billing')
 @billing_bp.route('/pricing')
 def pricing():
     """Display pricing page with all plans"""
-    plans = Plan.query.filter_by(is_active=True).order_by(Plan.display_order).all()
+    plans = plan_catalog.active_plans()
     
     # Get user's current plan if logged in
     user_plan = None
@@ -24,7 +25,7 @@ def pricing():
 @billing_bp.route('/plans')
 def get_plans():
     """API endpoint to get all active plans (for AJAX)"""
-    plans = Plan.query.filter_by(is_active=True).order_by(Plan.display_order).all()
+    plans = plan_catalog.active_plans()
     
     plan_data = []
     for plan in plans:
@@ -2,6 +2,8 @@ from flask import Blueprint, render_template, jsonify, request
 from flask_login import login_required, current_user
 from app.models import Post, ScheduledPost, PostAnalytics, Media, Portfolio
 from app import db
+from app.services.analytics_service import analytics_service
+from app.services.stats_service import stats_service
 from datetime import datetime, timedelta
 
 dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/dashboard')
@@ -11,22 +13,13 @@ dashboard_bp = Blueprint('dashboard', __name__, url_prefix='/dashboard')
 def index():
     """Main dashboard"""
     # Get dashboard statistics
-    total_posts = Post.query.filter_by(user_id=current_user.id).count()
-    pending_posts = Post.query.filter_by(user_id=current_user.id, status='pending').count()
-    approved_posts = Post.query.filter_by(user_id=current_user.id, status='approved').count()
-    posted_posts = Post.query.filter_by(user_id=current_user.id, status='posted').count()
+    stats = stats_service.get_stats(current_user.id)
     
-    scheduled_posts = ScheduledPost.query.filter_by(user_id=current_user.id, publish_status='scheduled').count()
-    
-    # Get total engagement
-    total_analytics = db.session.query(db.func.sum(PostAnalytics.likes),
-                                       db.func.sum(PostAnalytics.comments),
-                                       db.func.sum(PostAnalytics.shares)).filter(
-                                       PostAnalytics.user_id == current_user.id).first()
-    
-    total_likes = total_analytics[0] or 0
-    total_comments = total_analytics[1] or 0
-    total_shares = total_analytics[2] or 0
+    # Get total engagement (from the daily rollup - cost does not grow with post count)
+    totals = analytics_service.get_totals(current_user.id)
+    total_likes = totals['likes']
+    total_comments = totals['comments']
+    total_shares = totals['shares']
     
     # Recent posts
     recent_posts = Post.query.filter_by(user_id=current_user.id).order_by(
@@ -44,40 +37,18 @@ def index():
     ).order_by(ScheduledPost.scheduled_at).limit(5).all()
     
     # Get engagement trend (last 7 days)
-    seven_days_ago = datetime.utcnow() - timedelta(days=7)
-    daily_stats = db.session.query(
-        db.func.date(PostAnalytics.updated_at).label('date'),
-        db.func.sum(PostAnalytics.likes).label('likes'),
-        db.func.sum(PostAnalytics.comments).label('comments')
-    ).filter(
-        PostAnalytics.user_id == current_user.id,
-        PostAnalytics.updated_at >= seven_days_ago
-    ).group_by(db.func.date(PostAnalytics.updated_at)).all()
-    
+    trend = analytics_service.get_daily_trend(current_user.id, days=7)
     engagement_data = {
-        'dates': [str(stat[0]) for stat in daily_stats],
-        'likes': [stat[1] or 0 for stat in daily_stats],
-        'comments': [stat[2] or 0 for stat in daily_stats]
+        'dates': trend['dates'],
+        'likes': trend['likes'],
+        'comments': trend['comments']
     }
     
-    # Media library count
-    media_count = Media.query.filter_by(user_id=current_user.id).count()
-    
-    # Portfolio count
-    portfolio_count = Portfolio.query.filter_by(user_id=current_user.id).count()
-    
-    stats = {
-        'total_posts': total_posts,
-        'pending_posts': pending_posts,
-        'approved_posts': approved_posts,
-        'posted_posts': posted_posts,
-        'scheduled_posts': scheduled_posts,
+    stats.update({
         'total_likes': total_likes,
         'total_comments': total_comments,
-        'total_shares': total_shares,
-        'media_count': media_count,
-        'portfolio_count': portfolio_count
-    }
+        'total_shares': total_shares
+    })
     
     return render_template('dashboard/index.html',
                           stats=stats,
@@ -90,16 +61,12 @@ def index():
 @login_required
 def get_stats():
     """Get dashboard stats as JSON"""
-    total_posts = Post.query.filter_by(user_id=current_user.id).count()
-    pending = Post.query.filter_by(user_id=current_user.id, status='pending').count()
-    approved = Post.query.filter_by(user_id=current_user.id, status='approved').count()
-    posted = Post.query.filter_by(user_id=current_user.id, status='posted').count()
-    scheduled = ScheduledPost.query.filter_by(user_id=current_user.id, publish_status='scheduled').count()
+    stats = stats_service.get_stats(current_user.id)
     
     return jsonify({
-        'total_posts': total_posts,
-        'pending': pending,
-        'approved': approved,
-        'posted': posted,
-        'scheduled': scheduled
+        'total_posts': stats['total_posts'],
+        'pending': stats['pending_posts'],
+        'approved': stats['approved_posts'],
+        'posted': stats['posted_posts'],
+        'scheduled': stats['scheduled_posts']
     })
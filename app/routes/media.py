@@ -1,13 +1,59 @@
-from flask import Blueprint, render_template, request, jsonify, current_app
+from flask import Blueprint, render_template, request, jsonify, current_app, send_file, url_for, abort
 from flask_login import login_required, current_user
 from app.models import Media
 from app import db
 from app.services.media_service import media_service
+from app.services.blob_store import blob_store
+from app.services.stats_service import stats_service
+from app.services.quota_service import quota_service, QuotaExceeded
 from werkzeug.utils import secure_filename
+from urllib.parse import quote
+import mimetypes
 import os
 
 media_bp = Blueprint('media', __name__, url_prefix='/media')
 
+
+def media_urls(media):
+    """Public URLs for a media item: the original and a thumbnail (None for videos without a poster)"""
+    has_thumb = media.media_type == 'image' or 'thumb' in (media.derivatives or {})
+    return {
+        'url': url_for('media.file', media_id=media.id),
+        'thumbnail_url': url_for('media.file', media_id=media.id, variant='thumb') if has_thumb else None
+    }
+
+
+def send_upload(path, etag=None):
+    """
+    Respond with a file from UPLOAD_FOLDER according to MEDIA_SERVE_MODE.
+    
+    'sendfile' lets Werkzeug answer Range/If-None-Match and pass the file to the
+    server's wsgi.file_wrapper (sendfile(2) under gunicorn); 'x-accel' and
+    'x-sendfile' only set a header so the front proxy streams the bytes.
+    """
+    mode = current_app.config['MEDIA_SERVE_MODE']
+    max_age = current_app.config['MEDIA_CACHE_MAX_AGE']
+    
+    if mode == 'sendfile':
+        response = send_file(path, conditional=True, etag=etag or True, max_age=max_age)
+    else:
+        response = current_app.response_class(mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream')
+        if mode == 'x-accel':
+            relative = os.path.relpath(path, current_app.config['UPLOAD_FOLDER']).replace(os.sep, '/')
+            response.headers['X-Accel-Redirect'] = current_app.config['MEDIA_ACCEL_PREFIX'].rstrip('/') + '/' + quote(relative)
+        else:
+            response.headers['X-Sendfile'] = path
+        if etag:
+            response.set_etag(etag)
+        response.cache_control.max_age = max_age
+        response = response.make_conditional(request)
+    
+    # Only the owner may fetch it; keep it out of shared caches
+    response.cache_control.public = False
+    response.cache_control.private = True
+    return response
+
+
 @media_bp.route('/')
 @login_required
 def index():
@@ -43,47 +89,29 @@ def upload():
         return jsonify({'success': False, 'error': 'File type not allowed'}), 400
     
     try:
-        # Save file
-        file_path, filename = media_service.save_uploaded_file(file, current_user.id, media_type)
-        
-        # Get file info
-        file_size = os.path.getsize(file_path)
+        # Save file (identical content is stored once and shared)
+        file_path, filename, content_hash, is_duplicate = media_service.save_uploaded_file(file, media_type)
         
-        # Create media record
-        media = Media(
-            user_id=current_user.id,
-            filename=filename,
-            file_path=file_path,
-            media_type=media_type,
-            file_extension=os.path.splitext(filename)[1].lower(),
-            file_size=file_size,
+        media = media_service.create_media(
+            current_user.id, file_path, filename, content_hash, is_duplicate,
             title=request.form.get('title', secure_filename(file.filename)),
             description=request.form.get('description', '')
         )
         
-        # Process media
-        if media_type == 'image':
-            width, height = media_service.get_image_dimensions(file_path)
-            media.width = width
-            media.height = height
-            
-            # Create thumbnail
-            thumb_path = media_service.create_thumbnail(file_path)
-            if thumb_path:
-                media.thumbnail_path = thumb_path
-        
-        db.session.add(media)
-        db.session.commit()
-        
         return jsonify({
             'success': True,
             'media_id': media.id,
             'filename': filename,
             'media_type': media_type,
+            'processing_status': media.processing_status,
             'message': 'File uploaded successfully'
         }), 201
         
+    except QuotaExceeded as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 403
     except Exception as e:
+        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 400
 
 @media_bp.route('/<int:media_id>')
@@ -94,6 +122,31 @@ def view(media_id):
     
     return render_template('media/view.html', media=media)
 
+@media_bp.route('/<int:media_id>/file')
+@media_bp.route('/<int:media_id>/file/<variant>')
+@login_required
+def file(media_id, variant='original'):
+    """Serve an owned media file, or one of its derivatives (thumb, preview, facebook, poster)"""
+    media = Media.query.with_entities(
+        Media.file_path, Media.derivatives, Media.content_hash, Media.media_type
+    ).filter_by(id=media_id, user_id=current_user.id).first_or_404()
+    
+    if variant not in ('original', 'poster') and variant not in current_app.config['MEDIA_DERIVATIVE_SIZES']:
+        abort(404)
+    
+    path = media.file_path if variant == 'original' else (media.derivatives or {}).get(variant)
+    if not path and media.media_type == 'image':
+        path = media.file_path  # Derivatives not generated yet
+    if not path or not os.path.isfile(path):
+        abort(404)
+    
+    # Blobs never change, so the content hash is a strong validator
+    etag = None
+    if media.content_hash:
+        etag = media.content_hash if path == media.file_path else f'{media.content_hash}-{variant}'
+    
+    return send_upload(path, etag)
+
 @media_bp.route('/<int:media_id>/edit', methods=['POST'])
 @login_required
 def edit(media_id):
@@ -115,39 +168,53 @@ def delete(media_id):
     media = Media.query.filter_by(id=media_id, user_id=current_user.id).first_or_404()
     
     try:
-        # Delete files
-        if os.path.exists(media.file_path):
-            os.remove(media.file_path)
+        quota_service.release(current_user.id, 'media_storage_gb', media.file_size or 0)
         
-        if media.thumbnail_path and os.path.exists(media.thumbnail_path):
-            os.remove(media.thumbnail_path)
+        # Delete files (shared blobs only once no other row references them)
+        if media.content_hash:
+            blob_store.release(media.content_hash)
+        else:
+            if os.path.exists(media.file_path):
+                os.remove(media.file_path)
+            
+            if media.thumbnail_path and os.path.exists(media.thumbnail_path):
+                os.remove(media.thumbnail_path)
         
         db.session.delete(media)
         db.session.commit()
+        stats_service.invalidate(current_user.id)
         
         return jsonify({'success': True, 'message': 'Media deleted'})
     except Exception as e:
+        # Also moves a released blob's files back
+        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 400
 
 @media_bp.route('/api/list')
 @login_required
 def api_list():
-    """Get media list as JSON (for post creation)"""
-    media_type = request.args.get('type', 'all')
-    
-    query = Media.query.filter_by(user_id=current_user.id)
-    
-    if media_type in ['image', 'video']:
-        query = query.filter_by(media_type=media_type)
-    
-    media = query.order_by(Media.created_at.desc()).all()
+    """Get media list as JSON (for post creation); pass ?cursor= from X-Next-Cursor for the next page"""
+    try:
+        media, next_cursor = media_service.list_media(
+            current_user.id,
+            media_type=request.args.get('type', 'all'),
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', 50, type=int)
+        )
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     
-    return jsonify([{
+    response = jsonify([{
         'id': m.id,
         'filename': m.filename,
         'media_type': m.media_type,
         'title': m.title,
-        'thumbnail_path': m.thumbnail_path or m.file_path,
+        **media_urls(m),
         'width': m.width,
-        'height': m.height
+        'height': m.height,
+        'duration': m.duration,
+        'processing_status': m.processing_status
     } for m in media])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
@@ -1,11 +1,15 @@
-from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for
+from flask import Blueprint, render_template, request, jsonify, flash, redirect, url_for, current_app, Response, stream_with_context
 from flask_login import login_required, current_user
 from app.models import Portfolio, Post
 from app import db
 from app.services.portfolio_service import portfolio_service
 from app.services.media_service import media_service
+from app.services.blob_store import blob_store
 from app.services.ai_service import ai_service
+from app.services.stats_service import stats_service
+from app.services.quota_service import quota_service, QuotaExceeded
 from werkzeug.utils import secure_filename
+import json
 import os
 
 portfolios_bp = Blueprint('portfolios', __name__, url_prefix='/portfolios')
@@ -41,53 +45,26 @@ def upload():
         return jsonify({'success': False, 'error': 'File type not allowed'}), 400
     
     try:
-        # Save file
-        file_path, filename = media_service.save_uploaded_file(file, current_user.id, 'portfolio')
+        # Save file (identical content is stored once and shared)
+        file_path, filename, content_hash, is_duplicate = media_service.save_uploaded_file(file, 'portfolio')
         
-        # Determine file type
-        if ext == '.pdf':
-            file_type = 'pdf'
-        elif ext in ['.docx', '.doc']:
-            file_type = 'docx' if ext == '.docx' else 'doc'
-        elif ext == '.txt':
-            file_type = 'txt'
-        else:
-            file_type = 'image'
-        
-        # Get file size
-        file_size = os.path.getsize(file_path)
-        
-        # Create portfolio record
-        portfolio = Portfolio(
-            user_id=current_user.id,
-            filename=filename,
-            file_path=file_path,
-            file_type=file_type,
-            file_size=file_size,
+        portfolio = portfolio_service.create_portfolio(
+            current_user.id, file_path, filename, content_hash, is_duplicate,
             title=request.form.get('title', secure_filename(file.filename)),
-            description=request.form.get('description', ''),
-            status='processing'
+            description=request.form.get('description', '')
         )
         
-        # Extract text from document
-        try:
-            extracted_text = portfolio_service.extract_text_from_file(file_path, file_type)
-            portfolio.extracted_text = extracted_text
-        except Exception as e:
-            portfolio.status = 'failed'
-            print(f'Error extracting text: {e}')
-        
-        db.session.add(portfolio)
-        db.session.commit()
-        
         return jsonify({
             'success': True,
             'portfolio_id': portfolio.id,
             'filename': filename,
+            'status': portfolio.status,
+            'status_url': url_for('portfolios.status', portfolio_id=portfolio.id),
             'message': 'Portfolio uploaded successfully'
-        }), 201
+        }), 202
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 400
 
 @portfolios_bp.route('/<int:portfolio_id>')
@@ -101,22 +78,49 @@ def view(portfolio_id):
     
     return render_template('portfolios/view.html', portfolio=portfolio, ai_posts=ai_posts)
 
+@portfolios_bp.route('/<int:portfolio_id>/status')
+@login_required
+def status(portfolio_id):
+    """Poll text extraction progress"""
+    portfolio = Portfolio.query.filter_by(id=portfolio_id, user_id=current_user.id).first_or_404()
+    
+    return jsonify({
+        'id': portfolio.id,
+        'status': portfolio.status,
+        'has_text': bool(portfolio.extracted_text),
+        'ai_posts_generated': portfolio.ai_posts_generated,
+        'is_processed': portfolio.is_processed
+    })
+
 @portfolios_bp.route('/<int:portfolio_id>/generate-posts', methods=['POST'])
 @login_required
 def generate_posts(portfolio_id):
     """Generate AI posts from portfolio"""
     portfolio = Portfolio.query.filter_by(id=portfolio_id, user_id=current_user.id).first_or_404()
     
+    if portfolio.status in ('uploaded', 'processing'):
+        return jsonify({'success': False, 'error': 'Portfolio is still being processed'}), 409
+    
     if not portfolio.extracted_text:
         return jsonify({'success': False, 'error': 'No content to generate posts from'}), 400
     
     try:
-        num_posts = request.json.get('num_posts', 3)
+        num_posts = int((request.json or {}).get('num_posts', 3))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'Invalid number of posts'}), 400
+    max_posts = current_app.config['AI_MAX_POSTS_PER_REQUEST']
+    if not 1 <= num_posts <= max_posts:
+        return jsonify({'success': False, 'error': f'You can generate between 1 and {max_posts} posts at a time'}), 400
+    
+    try:
+        # Cheap early exit; the atomic consume below is what enforces the limit
+        quota_service.check(current_user, 'ai_captions_per_month', num_posts)
         
         # Generate posts using AI
         generated_posts = ai_service.generate_posts_from_portfolio(
-            portfolio.extracted_text, 
-            num_posts=num_posts
+            portfolio, 
+            num_posts=num_posts,
+            user_id=current_user.id
         )
         
         # Save generated posts
@@ -137,7 +141,7 @@ def generate_posts(portfolio_id):
                 hashtags=hashtags,
                 original_content=content,
                 status='pending',
-                ai_model_used='claude-3-5-sonnet-20241022'
+                ai_model_used=ai_service.MODEL
             )
             db.session.add(post)
             created_posts.append(post)
@@ -145,7 +149,9 @@ def generate_posts(portfolio_id):
         portfolio.ai_posts_generated = len(created_posts)
         portfolio.is_processed = True
         portfolio.status = 'completed'
+        quota_service.consume(current_user, 'ai_captions_per_month', len(created_posts))
         db.session.commit()
+        stats_service.invalidate(current_user.id)
         
         return jsonify({
             'success': True,
@@ -153,9 +159,103 @@ def generate_posts(portfolio_id):
             'message': f'{len(created_posts)} posts generated and added to pending queue'
         })
         
+    except QuotaExceeded as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 403
     except Exception as e:
+        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 400
 
+def sse_event(event, data):
+    """One Server-Sent Events message"""
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+@portfolios_bp.route('/<int:portfolio_id>/generate-posts/stream', methods=['POST'])
+@login_required
+def generate_posts_stream(portfolio_id):
+    """Generate AI posts, saving each one and pushing it to the browser (Server-Sent Events) as it arrives"""
+    portfolio = Portfolio.query.filter_by(id=portfolio_id, user_id=current_user.id).first_or_404()
+    
+    if portfolio.status in ('uploaded', 'processing'):
+        return jsonify({'success': False, 'error': 'Portfolio is still being processed'}), 409
+    
+    if not portfolio.extracted_text:
+        return jsonify({'success': False, 'error': 'No content to generate posts from'}), 400
+    
+    try:
+        num_posts = int((request.json or {}).get('num_posts', 3))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'Invalid number of posts'}), 400
+    max_posts = current_app.config['AI_MAX_POSTS_PER_REQUEST']
+    if not 1 <= num_posts <= max_posts:
+        return jsonify({'success': False, 'error': f'You can generate between 1 and {max_posts} posts at a time'}), 400
+    
+    try:
+        quota_service.check(current_user, 'ai_captions_per_month', num_posts)
+    except QuotaExceeded as e:
+        return jsonify({'success': False, 'error': str(e)}), 403
+    
+    user = current_user._get_current_object()
+    
+    def events():
+        created = 0
+        yield sse_event('started', {'num_posts': num_posts})
+        try:
+            try:
+                for post_data, error in ai_service.stream_posts_from_portfolio(portfolio, num_posts, user_id=user.id):
+                    if error:
+                        yield sse_event('skipped', {'error': error})
+                        continue
+                    
+                    content = post_data.get('content', '')
+                    hashtags = post_data.get('hashtags', '')
+                    if isinstance(hashtags, list):
+                        hashtags = ' '.join(hashtags)
+                    post = Post(
+                        user_id=user.id,
+                        content=content,
+                        post_type='ai_generated',
+                        source_id=portfolio_id,
+                        hashtags=hashtags,
+                        original_content=content,
+                        status='pending',
+                        ai_model_used=ai_service.MODEL
+                    )
+                    db.session.add(post)
+                    quota_service.consume(user, 'ai_captions_per_month')
+                    db.session.commit()
+                    created += 1
+                    
+                    yield sse_event('post', {
+                        'id': post.id,
+                        'content': content,
+                        'hashtags': hashtags,
+                        'url': url_for('posts.view', post_id=post.id)
+                    })
+                    if created >= num_posts:
+                        break
+            except Exception as e:
+                # Posts saved so far are kept
+                db.session.rollback()
+                yield sse_event('error', {'error': str(e)})
+        finally:
+            # Also runs when the client disconnects mid-stream
+            if created:
+                db.session.rollback()
+                Portfolio.query.filter_by(id=portfolio_id).update({
+                    'ai_posts_generated': created,
+                    'is_processed': True,
+                    'status': 'completed'
+                }, synchronize_session=False)
+                db.session.commit()
+                stats_service.invalidate(user.id)
+        yield sse_event('done', {'posts_generated': created})
+    
+    return Response(stream_with_context(events()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Let nginx pass events through unbuffered
+    })
+
 @portfolios_bp.route('/<int:portfolio_id>/delete', methods=['POST'])
 @login_required
 def delete(portfolio_id):
@@ -163,8 +263,10 @@ def delete(portfolio_id):
     portfolio = Portfolio.query.filter_by(id=portfolio_id, user_id=current_user.id).first_or_404()
     
     try:
-        # Delete file
-        if os.path.exists(portfolio.file_path):
+        # Delete file (shared blobs only once no other row references them)
+        if portfolio.content_hash:
+            blob_store.release(portfolio.content_hash)
+        elif os.path.exists(portfolio.file_path):
             os.remove(portfolio.file_path)
         
         # Delete related posts
@@ -172,7 +274,10 @@ def delete(portfolio_id):
         
         db.session.delete(portfolio)
         db.session.commit()
+        stats_service.invalidate(current_user.id)
         
         return jsonify({'success': True, 'message': 'Portfolio deleted'})
     except Exception as e:
+        # Also moves a released blob's files back
+        db.session.rollback()
         return jsonify({'success': False, 'error': str(e)}), 400
@@ -1,8 +1,12 @@
 from flask import Blueprint, render_template, request, jsonify, redirect, url_for, flash
 from flask_login import login_required, current_user
-from app.models import Post, Media, ScheduledPost, PostAnalytics
+from app.models import Post, ScheduledPost, PostAnalytics
 from app import db
 from app.services.post_service import post_service
+from app.services.page_service import page_service
+from app.services.publication_service import publication_service
+from app.services.stats_service import stats_service
+from app.services.quota_service import quota_service, QuotaExceeded
 from datetime import datetime, timedelta
 from werkzeug.utils import secure_filename
 import os
@@ -42,13 +46,14 @@ def create():
             post = post_service.create_post(current_user, content, post_type, media_ids, hashtags)
             flash(f'Post created and added to pending queue', 'success')
             return redirect(url_for('posts.view', post_id=post.id))
+        except QuotaExceeded as e:
+            db.session.rollback()
+            return jsonify({'success': False, 'error': str(e)}), 403
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)}), 400
     
-    # Get available media
-    media = Media.query.filter_by(user_id=current_user.id).all()
-    
-    return render_template('posts/create.html', media=media)
+    # The media picker pages through /api/media/list itself
+    return render_template('posts/create.html')
 
 @posts_bp.route('/<int:post_id>')
 @login_required
@@ -62,7 +67,12 @@ def view(post_id):
     # Get related media
     media = post.media_items
     
-    return render_template('posts/view.html', post=post, analytics=analytics, media=media)
+    # Multi-page publishing
+    pages = page_service.list_pages(current_user.id)
+    publications = publication_service.list_publications(post)
+    
+    return render_template('posts/view.html', post=post, analytics=analytics, media=media,
+                           pages=pages, publications=publications)
 
 @posts_bp.route('/<int:post_id>/edit', methods=['GET', 'POST'])
 @login_required
@@ -89,9 +99,7 @@ def edit(post_id):
         except Exception as e:
             return jsonify({'success': False, 'error': str(e)}), 400
     
-    media = Media.query.filter_by(user_id=current_user.id).all()
-    
-    return render_template('posts/edit.html', post=post, media=media)
+    return render_template('posts/edit.html', post=post)
 
 @posts_bp.route('/<int:post_id>/approve', methods=['POST'])
 @login_required
@@ -125,6 +133,35 @@ def publish(post_id):
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
+@posts_bp.route('/<int:post_id>/publish-pages', methods=['POST'])
+@login_required
+def publish_pages(post_id):
+    """Publish post to several Facebook pages at once: {page_ids: [...]}"""
+    post = Post.query.filter_by(id=post_id, user_id=current_user.id).first_or_404()
+    
+    if post.status not in ['pending', 'approved', 'posted']:
+        return jsonify({'success': False, 'error': 'Cannot publish this post'}), 400
+    
+    try:
+        summary = publication_service.publish(post, current_user, (request.json or {}).get('page_ids') or [])
+        return jsonify(dict(summary, success=summary['failed'] == 0))
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@posts_bp.route('/<int:post_id>/publish-pages/retry', methods=['POST'])
+@login_required
+def retry_publish_pages(post_id):
+    """Re-publish only the pages that failed"""
+    post = Post.query.filter_by(id=post_id, user_id=current_user.id).first_or_404()
+    
+    try:
+        summary = publication_service.retry_failed(post, current_user)
+        return jsonify(dict(summary, success=summary['failed'] == 0))
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 400
+
 @posts_bp.route('/<int:post_id>/schedule', methods=['POST'])
 @login_required
 def schedule(post_id):
@@ -152,12 +189,17 @@ def schedule(post_id):
         
         post.status = 'approved'  # Auto-approve when scheduling
         db.session.add(scheduled)
+        quota_service.consume(current_user, 'scheduled_posts')
         db.session.commit()
+        stats_service.invalidate(current_user.id)
         
         flash(f'Post scheduled for {scheduled_time.strftime("%Y-%m-%d %H:%M")}', 'success')
         return jsonify({'success': True, 'message': 'Post scheduled'})
     except ValueError:
         return jsonify({'success': False, 'error': 'Invalid datetime format'}), 400
+    except QuotaExceeded as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 403
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 400
 
@@ -185,8 +227,14 @@ def delete(post_id):
         return jsonify({'success': False, 'error': 'Cannot delete published posts'}), 400
     
     try:
+        # Rows still waiting to publish stop counting against the scheduled posts limit
+        queued = post.scheduled_posts.filter(
+            ScheduledPost.publish_status.in_(('scheduled', 'publishing'))
+        ).count()
+        quota_service.release(current_user.id, 'scheduled_posts', queued)
         db.session.delete(post)
         db.session.commit()
+        stats_service.invalidate(current_user.id)
         flash('Post deleted', 'info')
         return jsonify({'success': True, 'message': 'Post deleted'})
     except Exception as e:
@@ -0,0 +1,138 @@
+from flask import Blueprint, request, jsonify, current_app, url_for
+from flask_login import login_required, current_user
+from app import db
+from app.services.upload_service import upload_service
+from app.services.quota_service import QuotaExceeded
+from werkzeug.utils import secure_filename
+
+uploads_bp = Blueprint('uploads', __name__, url_prefix='/uploads')
+
+
+def session_json(session):
+    return {
+        'upload_id': session.id,
+        'target': session.target,
+        'filename': session.filename,
+        'total_size': session.total_size,
+        'received_size': session.received_size,
+        'status': session.status,
+        'upload_url': url_for('uploads.chunk', upload_id=session.id),
+        'complete_url': url_for('uploads.complete', upload_id=session.id)
+    }
+
+
+@uploads_bp.route('/', methods=['POST'])
+@login_required
+def create():
+    """Start a resumable upload: {target: media|portfolio, filename, size, title, description}"""
+    data = request.get_json() or {}
+    filename = secure_filename(data.get('filename', ''))
+
+    if not filename:
+        return jsonify({'success': False, 'error': 'No file selected'}), 400
+
+    try:
+        session = upload_service.create_session(
+            current_user.id,
+            data.get('target', 'media'),
+            filename,
+            int(data.get('size') or 0),
+            title=data.get('title') or filename,
+            description=data.get('description', '')
+        )
+    except QuotaExceeded as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 403
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    return jsonify(dict(
+        session_json(session),
+        success=True,
+        chunk_size=current_app.config['UPLOAD_CHUNK_SIZE']
+    )), 201
+
+
+@uploads_bp.route('/<upload_id>', methods=['GET'])
+@login_required
+def progress(upload_id):
+    """Bytes received so far - where a client resumes after a dropped connection"""
+    session = upload_service.get_session(upload_id, current_user.id)
+    if not session:
+        return jsonify({'success': False, 'error': 'Upload not found'}), 404
+
+    response = jsonify(dict(session_json(session), success=True))
+    response.headers['Upload-Offset'] = str(session.received_size)
+    return response
+
+
+@uploads_bp.route('/<upload_id>', methods=['PUT'])
+@login_required
+def chunk(upload_id):
+    """Append the raw request body at the Upload-Offset header (or ?offset=)"""
+    offset = request.headers.get('Upload-Offset', request.args.get('offset'))
+    if offset is None or not str(offset).isdigit():
+        return jsonify({'success': False, 'error': 'Upload-Offset header is required'}), 400
+
+    session = upload_service.get_session(upload_id, current_user.id)
+    if not session or session.status != 'uploading':
+        return jsonify({'success': False, 'error': 'Upload not found'}), 404
+    if int(offset) != session.received_size:
+        # Client is out of sync (e.g. a retried chunk that already landed) - tell it where to resume
+        return jsonify({
+            'success': False,
+            'error': 'Offset mismatch',
+            'received_size': session.received_size
+        }), 409
+
+    try:
+        session = upload_service.write_chunk(upload_id, current_user.id, int(offset), request.stream)
+    except Exception as e:
+        db.session.rollback()
+        session = upload_service.get_session(upload_id, current_user.id)
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'received_size': session.received_size if session else None
+        }), 400
+
+    response = jsonify({
+        'success': True,
+        'received_size': session.received_size,
+        'total_size': session.total_size,
+        'complete': session.is_complete
+    })
+    response.headers['Upload-Offset'] = str(session.received_size)
+    return response
+
+
+@uploads_bp.route('/<upload_id>/complete', methods=['POST'])
+@login_required
+def complete(upload_id):
+    """Finish the upload and create the Media or Portfolio record"""
+    try:
+        session = upload_service.complete(upload_id, current_user.id)
+    except QuotaExceeded as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 403
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    payload = dict(session_json(session), success=True, message='File uploaded successfully')
+    if session.target == 'media':
+        payload['media_id'] = session.record_id
+    else:
+        payload['portfolio_id'] = session.record_id
+        payload['status_url'] = url_for('portfolios.status', portfolio_id=session.record_id)
+    return jsonify(payload), 201
+
+
+@uploads_bp.route('/<upload_id>', methods=['DELETE'])
+@login_required
+def cancel(upload_id):
+    """Abort an unfinished upload"""
+    if not upload_service.abort(upload_id, current_user.id):
+        return jsonify({'success': False, 'error': 'Upload not found'}), 404
+    return jsonify({'success': True, 'message': 'Upload cancelled'})
@@ -0,0 +1,161 @@
+"""
+AI Response Cache
+Reuses responses of deterministic AIService calls (improve, hashtags, captions)
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+from app import db
+from app.models import CachedAIResponse
+
+logger = logging.getLogger(__name__)
+
+
+class AICache:
+    """
+    Two-tier cache keyed by sha256(method, model, whitespace-normalized prompt).
+
+    The in-process tier is an LRU of AI_CACHE_MAX_ENTRIES responses; misses
+    fall through to the ai_response_cache table, which every process shares.
+    Both expire after AI_CACHE_TTL. The table is read and written in its own
+    short session, so a lookup never commits the caller's transaction, and a
+    database error only costs the cache, not the AI call. On SQLite those
+    sessions are serialized: it allows one writer, and an in-memory database
+    (TestingConfig) is a single connection shared by every thread.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()  # key -> (expires_at, response)
+        self._lock = threading.Lock()
+        self._sqlite_lock = threading.Lock()
+        self._counters = Counter()
+
+    @staticmethod
+    def key(method, model, prompt):
+        normalized = ' '.join(prompt.split())
+        return hashlib.sha256(f'{method}\0{model}\0{normalized}'.encode('utf-8')).hexdigest()
+
+    def get_or_compute(self, method, model, prompt, compute):
+        """Cached response for the prompt, calling compute() (the API call) on a miss"""
+        key = self.key(method, model, prompt)
+
+        response = self._get_memory(key)
+        if response is not None:
+            self._count('memory_hits')
+            return response
+
+        response = self._get_db(key)
+        if response is not None:
+            self._count('db_hits')
+            self._put_memory(key, response)
+            return response
+
+        self._count('misses')
+        response = compute()
+        self._put_memory(key, response)
+        self._put_db(key, method, model, response)
+        return response
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _get_memory(self, key):
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                return None
+            if cached[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return cached[1]
+
+    def _put_memory(self, key, response):
+        expires_at = time.monotonic() + current_app.config['AI_CACHE_TTL']
+        max_entries = current_app.config['AI_CACHE_MAX_ENTRIES']
+        with self._lock:
+            self._entries[key] = (expires_at, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    @contextmanager
+    def _session(self):
+        """Short session for the database tier, one at a time on SQLite"""
+        lock = self._sqlite_lock if db.engine.dialect.name == 'sqlite' else nullcontext()
+        with lock, Session(db.engine) as session:
+            yield session
+
+    def _get_db(self, key):
+        try:
+            with self._session() as session:
+                return session.query(CachedAIResponse.response).filter(
+                    CachedAIResponse.cache_key == key,
+                    CachedAIResponse.expires_at > datetime.utcnow()
+                ).scalar()
+        except SQLAlchemyError as e:
+            logger.warning(f"AI cache lookup failed: {e}")
+            return None
+
+    def _put_db(self, key, method, model, response):
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=current_app.config['AI_CACHE_TTL'])
+        try:
+            with self._session() as session:
+                try:
+                    session.add(CachedAIResponse(
+                        cache_key=key, method=method, model=model, response=response,
+                        created_at=now, expires_at=expires_at
+                    ))
+                    session.commit()
+                except IntegrityError:
+                    # Expired row, or another process cached the same call first
+                    session.rollback()
+                    session.query(CachedAIResponse).filter_by(cache_key=key).update({
+                        'response': response, 'created_at': now, 'expires_at': expires_at
+                    }, synchronize_session=False)
+                    session.commit()
+        except SQLAlchemyError as e:
+            logger.warning(f"AI cache write failed: {e}")
+
+    def purge_expired(self):
+        """Delete expired rows from the database tier"""
+        purged = CachedAIResponse.query.filter(
+            CachedAIResponse.expires_at <= datetime.utcnow()
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        self._count('purged', purged)
+        return purged
+
+    def stats(self):
+        """Hit/miss and purge counters for this process"""
+        with self._lock:
+            counters = dict(self._counters)
+            entries = len(self._entries)
+        hits = counters.get('memory_hits', 0) + counters.get('db_hits', 0)
+        lookups = hits + counters.get('misses', 0)
+        return {
+            'memory_hits': counters.get('memory_hits', 0),
+            'db_hits': counters.get('db_hits', 0),
+            'misses': counters.get('misses', 0),
+            'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+            'entries': entries,
+            'purged': counters.get('purged', 0)
+        }
+
+    def clear(self):
+        """Drop the in-process tier and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+
+ai_cache = AICache()
@@ -0,0 +1,120 @@
+"""
+AI Executor
+Runs Anthropic API calls concurrently with a global cap and a per-user cap
+"""
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from flask import current_app
+
+
+class AIExecutor:
+    """
+    Shared thread pool for AI sub-requests.
+
+    At most AI_MAX_CONCURRENCY calls are in flight per process, and at most
+    AI_MAX_CONCURRENCY_PER_USER of them belong to one user, so a large
+    request cannot take every slot. Slots are taken by the calling (request)
+    thread before a call is submitted; pool threads never wait on a limit.
+    Streamed calls run in the request thread and hold a slot via slot().
+    """
+
+    def __init__(self):
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.Condition()
+        self._in_flight = 0
+        self._per_user = {}  # user_id -> calls in flight
+
+    def _executor(self, max_workers):
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ai')
+        return self._pool
+
+    def _has_slot(self, user_id, limit, user_limit):
+        return self._in_flight < limit and self._per_user.get(user_id, 0) < user_limit
+
+    def _try_acquire(self, user_id, limit, user_limit):
+        """Take a slot if both caps allow it (caller holds self._slots)"""
+        if not self._has_slot(user_id, limit, user_limit):
+            return False
+        self._in_flight += 1
+        self._per_user[user_id] = self._per_user.get(user_id, 0) + 1
+        return True
+
+    def _release(self, user_id):
+        with self._slots:
+            self._in_flight -= 1
+            remaining = self._per_user.get(user_id, 1) - 1
+            if remaining:
+                self._per_user[user_id] = remaining
+            else:
+                self._per_user.pop(user_id, None)
+            self._slots.notify_all()
+
+    @contextmanager
+    def slot(self, user_id=None):
+        """Hold one slot for work done in the calling thread, such as a streamed response"""
+        config = current_app.config
+        limit = config['AI_MAX_CONCURRENCY']
+        user_limit = config['AI_MAX_CONCURRENCY_PER_USER']
+        with self._slots:
+            if not self._slots.wait_for(lambda: self._try_acquire(user_id, limit, user_limit),
+                                        timeout=config['AI_QUEUE_TIMEOUT']):
+                raise Exception('The AI service is busy, please try again shortly')
+        try:
+            yield
+        finally:
+            self._release(user_id)
+
+    @staticmethod
+    def _call(app, fn, item):
+        # Calls can read config and the database like request code
+        with app.app_context():
+            return fn(item)
+
+    def run(self, fn, items, user_id=None):
+        """
+        Call fn(item) for every item concurrently.
+
+        Yields (item, result, error) in completion order, so callers can
+        merge results as they arrive. An item whose call raised is yielded
+        with its exception as error instead of aborting the others.
+        """
+        config = current_app.config
+        limit = config['AI_MAX_CONCURRENCY']
+        user_limit = config['AI_MAX_CONCURRENCY_PER_USER']
+        pool = self._executor(limit)
+        app = current_app._get_current_object()
+
+        queue = list(items)
+        queue.reverse()
+        pending = {}
+
+        while queue or pending:
+            with self._slots:
+                while queue and self._try_acquire(user_id, limit, user_limit):
+                    item = queue.pop()
+                    future = pool.submit(self._call, app, fn, item)
+                    future.add_done_callback(lambda _, user_id=user_id: self._release(user_id))
+                    pending[future] = item
+
+                if not pending:
+                    # Every slot this user may take is busy with other requests
+                    if not self._slots.wait_for(lambda: self._has_slot(user_id, limit, user_limit),
+                                                timeout=config['AI_QUEUE_TIMEOUT']):
+                        raise Exception('The AI service is busy, please try again shortly')
+                    continue
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                try:
+                    yield item, future.result(), None
+                except Exception as e:
+                    yield item, None, e
+
+
+ai_executor = AIExecutor()
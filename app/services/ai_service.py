@@ -1,17 +1,180 @@
-import anthropic
 import json
-from flask import current_app
+import threading
+from flask import current_app, has_app_context
+from app.services.ai_cache import ai_cache
+from app.services.ai_executor import ai_executor
+from app.services.portfolio_index import portfolio_index
+
+class JSONObjectStream:
+    """
+    Incremental parser for a streamed JSON array of objects.
+    
+    feed() takes text as it arrives and returns the source of each top-level
+    object once its closing brace is seen; anything between objects (the
+    surrounding '[', commas, prose) is skipped.
+    """
+    
+    def __init__(self):
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+    
+    def feed(self, text):
+        objects = []
+        for char in text:
+            if not self._depth:
+                if char == '{':
+                    self._depth = 1
+                    self._buffer = [char]
+                continue
+            
+            self._buffer.append(char)
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                self._depth += 1
+            elif char == '}':
+                self._depth -= 1
+                if not self._depth:
+                    objects.append(''.join(self._buffer))
+                    self._buffer = []
+        return objects
+
 
 class AIService:
     """Handle AI content generation for posts"""
     
+    MODEL = "claude-3-5-sonnet-20241022"
+    
+    # One per concurrent sub-request, so parallel posts don't repeat each other
+    POST_ANGLES = [
+        'a key benefit for customers',
+        'a standout product or service',
+        'what makes the business different from competitors',
+        'a customer success story or use case',
+        'a behind-the-scenes look at the business',
+        'a clear call to action',
+        'a practical tip related to the business\'s field',
+        'a question that invites comments',
+        'a milestone, achievement or credential',
+        'a timely or seasonal hook',
+    ]
+    
+    HTTP_SETTINGS = ('ANTHROPIC_CONNECT_TIMEOUT', 'ANTHROPIC_READ_TIMEOUT', 'ANTHROPIC_MAX_RETRIES')
+    
     def __init__(self):
-        self.client = anthropic.Anthropic()
+        self._settings = {}
+        self._client = None
+        self._client_lock = threading.Lock()
     
-    def generate_posts_from_portfolio(self, portfolio_text, num_posts=3):
-        """Generate social media posts from portfolio content"""
-        try:
-            prompt = f"""
+    def init_app(self, app):
+        """Capture HTTP client settings; the client itself is built on first use"""
+        self._settings = {key: app.config[key] for key in self.HTTP_SETTINGS if key in app.config}
+    
+    def _setting(self, key, default):
+        if key in self._settings:
+            return self._settings[key]
+        if has_app_context():
+            return current_app.config.get(key, default)
+        return default
+    
+    @property
+    def client(self):
+        """Shared Anthropic client, created once per process and safe to use from threads"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._create_client()
+        return self._client
+    
+    def _create_client(self):
+        # The SDK is slow to import, and migrations, seed scripts and the shell never call it
+        import anthropic
+        return anthropic.Anthropic(
+            timeout=anthropic.Timeout(
+                self._setting('ANTHROPIC_READ_TIMEOUT', 60),
+                connect=self._setting('ANTHROPIC_CONNECT_TIMEOUT', 5)
+            ),
+            max_retries=self._setting('ANTHROPIC_MAX_RETRIES', 2)
+        )
+    
+    def generate_posts_from_portfolio(self, portfolio, num_posts=3, user_id=None):
+        """Generate social media posts from a Portfolio's content"""
+        posts = []
+        errors = []
+        for post, error in self.iter_posts_from_portfolio(portfolio, num_posts, user_id=user_id):
+            if error:
+                errors.append(error)
+            else:
+                posts.append(post)
+        
+        if not posts:
+            raise Exception(f'Error generating posts: {errors[0] if errors else "no posts returned"}')
+        return posts
+    
+    def iter_posts_from_portfolio(self, portfolio, num_posts=3, user_id=None):
+        """
+        Generate posts with one concurrent request per post.
+        
+        Yields (post, None) as each request completes, or (None, error) for a
+        request that failed, so a 10-post batch takes about as long as one post.
+        Each request gets the portfolio passages that best fit its angle.
+        """
+        num_posts = max(1, min(int(num_posts), current_app.config['AI_MAX_POSTS_PER_REQUEST']))
+        angles = [self.POST_ANGLES[index % len(self.POST_ANGLES)] for index in range(num_posts)]
+        contexts = portfolio_index.contexts(portfolio, angles)
+        prompts = [
+            self._post_prompt(context, angle, index, num_posts)
+            for index, (context, angle) in enumerate(zip(contexts, angles))
+        ]
+        
+        for _, post, error in ai_executor.run(self._generate_post, prompts, user_id=user_id):
+            yield post, error
+    
+    def stream_posts_from_portfolio(self, portfolio, num_posts=3, user_id=None):
+        """
+        Generate posts in one streamed request.
+        
+        Yields (post, None) as soon as the model has finished writing each
+        post, or (None, error) for one that could not be parsed; the others
+        are unaffected.
+        """
+        num_posts = max(1, min(int(num_posts), current_app.config['AI_MAX_POSTS_PER_REQUEST']))
+        parser = JSONObjectStream()
+        
+        # The stream counts against the same global and per-user caps as pooled calls
+        with ai_executor.slot(user_id), self.client.messages.stream(
+            model=self.MODEL,
+            max_tokens=256 * num_posts,
+            messages=[
+                {
+                    "role": "user",
+                    "content": self._series_prompt(portfolio_index.context(portfolio), num_posts)
+                }
+            ]
+        ) as stream:
+            for text in stream.text_stream:
+                for source in parser.feed(text):
+                    try:
+                        post = json.loads(source)
+                    except ValueError as e:
+                        yield None, f'Could not parse a generated post: {e}'
+                        continue
+                    if not isinstance(post, dict) or not post.get('content'):
+                        yield None, 'Generated post has no content'
+                        continue
+                    yield post, None
+    
+    def _series_prompt(self, portfolio_text, num_posts):
+        return f"""
             You are a professional social media content creator. Based on the following business portfolio content, 
             generate {num_posts} engaging, unique Facebook posts that would appeal to business customers.
             
@@ -25,12 +188,62 @@ class AIService:
             Format as JSON array with 'content' and 'hashtags' fields.
             
             Portfolio Content:
-            {portfolio_text[:2000]}  # Limit to first 2000 chars
+            {portfolio_text}
             """
+    
+    def _post_prompt(self, portfolio_text, angle, index, num_posts):
+        return f"""
+            You are a professional social media content creator. Based on the following business portfolio content, 
+            write one engaging Facebook post that would appeal to business customers.
+            It is post {index + 1} of {num_posts} in a series; focus it on {angle}.
+            
+            Make it:
+            - Professional yet conversational
+            - Between 100-250 characters
+            - Include relevant hashtags
+            
+            Format as a JSON object with 'content' and 'hashtags' fields.
             
+            Portfolio Content:
+            {portfolio_text}
+            """
+    
+    def _generate_post(self, prompt):
+        """One post from one prompt (runs on an AI executor thread)"""
+        message = self.client.messages.create(
+            model=self.MODEL,
+            max_tokens=400,
+            messages=[
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ]
+        )
+        return self._parse_post(message.content[0].text)
+    
+    @staticmethod
+    def _parse_post(response_text):
+        """Extract the {'content', 'hashtags'} object from a response"""
+        start_idx = response_text.find('{')
+        end_idx = response_text.rfind('}') + 1
+        if start_idx != -1 and end_idx > start_idx:
+            try:
+                post = json.loads(response_text[start_idx:end_idx])
+                if isinstance(post, dict) and post.get('content'):
+                    return post
+            except ValueError:
+                pass
+        
+        # Fallback: use the raw text as the post
+        return {"content": response_text.strip(), "hashtags": "#socialmedia"}
+    
+    def _complete(self, method, prompt, max_tokens):
+        """Single-message completion, served from the AI response cache when possible"""
+        def call():
             message = self.client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=1024,
+                model=self.MODEL,
+                max_tokens=max_tokens,
                 messages=[
                     {
                         "role": "user",
@@ -38,95 +251,44 @@ class AIService:
                     }
                 ]
             )
-            
-            # Parse response
-            response_text = message.content[0].text
-            
-            # Try to extract JSON
-            try:
-                # Look for JSON array in response
-                start_idx = response_text.find('[')
-                end_idx = response_text.rfind(']') + 1
-                if start_idx != -1 and end_idx > start_idx:
-                    json_str = response_text[start_idx:end_idx]
-                    posts = json.loads(json_str)
-                    return posts
-            except:
-                pass
-            
-            # Fallback: return raw text as posts
-            return [{"content": response_text, "hashtags": "#socialmedia"}]
-            
-        except Exception as e:
-            raise Exception(f'Error generating posts: {str(e)}')
+            return message.content[0].text
+        
+        return ai_cache.get_or_compute(method, self.MODEL, prompt, call)
     
     def improve_post(self, post_content):
         """Improve or enhance existing post content"""
         try:
-            message = self.client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=500,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": f"""
+            return self._complete('improve_post', f"""
                         Please improve this Facebook post to make it more engaging and professional:
                         
                         Original: {post_content}
                         
                         Provide improved version only, no explanations.
-                        """
-                    }
-                ]
-            )
-            
-            return message.content[0].text
+                        """, max_tokens=500)
         except Exception as e:
             raise Exception(f'Error improving post: {str(e)}')
     
     def suggest_hashtags(self, post_content):
         """Suggest hashtags for a post"""
         try:
-            message = self.client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=100,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": f"""
+            return self._complete('suggest_hashtags', f"""
                         Suggest 5-8 relevant hashtags for this post:
                         {post_content}
                         
                         Return as comma-separated list only.
-                        """
-                    }
-                ]
-            )
-            
-            return message.content[0].text
+                        """, max_tokens=100)
         except Exception as e:
             raise Exception(f'Error suggesting hashtags: {str(e)}')
     
     def generate_auto_caption(self, image_description):
         """Generate auto-caption for an image"""
         try:
-            message = self.client.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=100,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": f"""
+            return self._complete('generate_auto_caption', f"""
                         Generate a short, engaging caption (max 100 chars) for this image:
                         {image_description}
                         
                         Return caption only.
-                        """
-                    }
-                ]
-            )
-            
-            return message.content[0].text.strip()
+                        """, max_tokens=100).strip()
         except Exception as e:
             raise Exception(f'Error generating caption: {str(e)}')
 
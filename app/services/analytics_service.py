@@ -0,0 +1,412 @@
+"""
+Analytics Sync Service
+Pulls engagement metrics for posted content from the Graph API in batches,
+upserts PostAnalytics rows in bulk and keeps the engagement rollups current
+"""
+import heapq
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import Post, PostAnalytics, User, DailyEngagement, HourlyEngagement
+from app.services.facebook_service import facebook_service
+
+logger = logging.getLogger(__name__)
+
+
+class AnalyticsService:
+    """Sync post engagement metrics from Facebook"""
+
+    SYNC_CHUNK_SIZE = 500  # Posts loaded from the database per sync step
+
+    @staticmethod
+    def parse_metrics(data):
+        """Extract likes/comments/shares counts from a Graph API post object"""
+        return {
+            'likes': (data.get('likes') or {}).get('summary', {}).get('total_count', 0),
+            'comments': (data.get('comments') or {}).get('summary', {}).get('total_count', 0),
+            'shares': (data.get('shares') or {}).get('count', 0),
+        }
+
+    def sync_posts(self, posts):
+        """
+        Refresh analytics for a set of posted posts.
+
+        Args:
+            posts: iterable of (post_id, user_id, facebook_post_id)
+
+        Returns:
+            dict: {'synced': int, 'errors': int, 'metrics': {post_id: {likes, comments, shares}}}
+        """
+        by_user = defaultdict(list)
+        for post_id, user_id, facebook_post_id in posts:
+            if facebook_post_id:
+                by_user[user_id].append((post_id, facebook_post_id))
+
+        if not by_user:
+            return {'synced': 0, 'errors': 0, 'metrics': {}}
+
+        tokens = dict(db.session.query(User.id, User.page_access_token).filter(
+            User.id.in_(list(by_user))
+        ).all())
+
+        metrics = {}  # post_id -> parsed metrics
+        owners = {}   # post_id -> user_id
+        errors = 0
+
+        for user_id, user_posts in by_user.items():
+            token = tokens.get(user_id)
+            if not token:
+                errors += len(user_posts)
+                continue
+
+            fb_to_post = {facebook_post_id: post_id for post_id, facebook_post_id in user_posts}
+            results = facebook_service.get_posts_analytics_batch(list(fb_to_post), token)
+
+            for facebook_post_id, result in results.items():
+                post_id = fb_to_post[facebook_post_id]
+                if 'error' in result:
+                    errors += 1
+                    logger.warning(f"Analytics sync failed for post {post_id}: {result['error']}")
+                    continue
+                metrics[post_id] = self.parse_metrics(result['data'])
+                owners[post_id] = user_id
+
+        self._upsert(metrics, owners)
+        return {'synced': len(metrics), 'errors': errors, 'metrics': metrics}
+
+    def sync_all(self):
+        """Walk every posted Post (in id order, chunk by chunk) and refresh its analytics"""
+        summary = {'synced': 0, 'errors': 0}
+        last_id = 0
+
+        while True:
+            chunk = db.session.query(Post.id, Post.user_id, Post.facebook_post_id).filter(
+                Post.status == 'posted',
+                Post.facebook_post_id.isnot(None),
+                Post.id > last_id
+            ).order_by(Post.id).limit(self.SYNC_CHUNK_SIZE).all()
+
+            if not chunk:
+                break
+
+            result = self.sync_posts(chunk)
+            summary['synced'] += result['synced']
+            summary['errors'] += result['errors']
+            last_id = chunk[-1][0]
+
+        logger.info(f"Analytics sync complete: {summary}")
+        return summary
+
+    def _upsert(self, metrics, owners):
+        """Bulk update existing PostAnalytics rows, insert missing ones and roll up the deltas"""
+        if not metrics:
+            return
+
+        now = datetime.utcnow()
+        existing = {row.post_id: row for row in db.session.query(
+            PostAnalytics.post_id, PostAnalytics.id, PostAnalytics.last_synced_at,
+            PostAnalytics.likes, PostAnalytics.comments, PostAnalytics.shares, PostAnalytics.reach
+        ).filter(PostAnalytics.post_id.in_(list(metrics))).all()}
+        # Engagement is attributed to the day and hour the post was published, as in rebuild_rollups()
+        posted = {post_id: posted_at or created_at for post_id, posted_at, created_at in db.session.query(
+            Post.id, Post.posted_at, Post.created_at
+        ).filter(Post.id.in_(list(metrics))).all()}
+
+        updates = []
+        inserts = []
+        daily = defaultdict(lambda: {'likes': 0, 'comments': 0, 'shares': 0, 'reach': 0})
+        hourly = defaultdict(lambda: {'posts': 0, 'engagement': 0})
+
+        for post_id, values in metrics.items():
+            if post_id not in posted:
+                continue  # Deleted since it was queued
+            row = dict(values, last_synced_at=now, updated_at=now)
+            previous = existing.get(post_id)
+            if previous:
+                row['id'] = previous.id
+                updates.append(row)
+            else:
+                row.update(post_id=post_id, user_id=owners[post_id], created_at=now)
+                inserts.append(row)
+
+            # Engagement gained since the previous sync; reach only changes if the metrics carry it
+            delta = {
+                metric: values[metric] - ((getattr(previous, metric) or 0) if previous else 0)
+                for metric in ('likes', 'comments', 'shares')
+            }
+            if 'reach' in values:
+                delta['reach'] = values['reach'] - ((previous.reach or 0) if previous else 0)
+            elif not previous or previous.last_synced_at is None:
+                delta['reach'] = (previous.reach or 0) if previous else 0
+            day = daily[(owners[post_id], posted[post_id].date())]
+            for metric, value in delta.items():
+                day[metric] += value
+
+            bucket = hourly[(owners[post_id], posted[post_id].hour)]
+            bucket['engagement'] += delta['likes'] + delta['comments'] + delta['shares']
+            if not previous or previous.last_synced_at is None:
+                bucket['posts'] += 1
+
+        if updates:
+            db.session.bulk_update_mappings(PostAnalytics, updates)
+        if inserts:
+            db.session.bulk_insert_mappings(PostAnalytics, inserts)
+        self._apply_rollups(daily, hourly)
+        db.session.commit()
+
+    @staticmethod
+    def _increment(model, key_filter, key_values, deltas):
+        """Atomically add deltas to a rollup row, creating it if it does not exist yet"""
+        deltas = {column: value for column, value in deltas.items() if value}
+        if not deltas:
+            return
+        updated = model.query.filter_by(**key_filter).update(
+            {getattr(model, column): getattr(model, column) + value for column, value in deltas.items()},
+            synchronize_session=False
+        )
+        if updated:
+            return
+
+        try:
+            with db.session.begin_nested():
+                db.session.add(model(**key_values, **deltas))
+        except IntegrityError:
+            # A concurrent sync created the row first
+            model.query.filter_by(**key_filter).update(
+                {getattr(model, column): getattr(model, column) + value for column, value in deltas.items()},
+                synchronize_session=False
+            )
+
+    def _apply_rollups(self, daily, hourly):
+        """Fold per-sync deltas into the daily and hour-of-day rollup tables"""
+        for (user_id, date), deltas in daily.items():
+            key = {'user_id': user_id, 'date': date}
+            self._increment(DailyEngagement, key, key, deltas)
+        for (user_id, hour), deltas in hourly.items():
+            key = {'user_id': user_id, 'hour': hour}
+            self._increment(HourlyEngagement, key, key, deltas)
+
+    def rebuild_rollups(self):
+        """
+        Recompute both rollup tables from PostAnalytics.
+
+        Used once to backfill existing data; each post's current totals are
+        attributed to the day and hour it was published, and the hourly post
+        count only includes posts that have been synced, as in _upsert().
+        """
+        DailyEngagement.query.delete()
+        HourlyEngagement.query.delete()
+
+        rows = db.session.query(
+            Post.user_id, Post.posted_at, Post.created_at, PostAnalytics.last_synced_at,
+            PostAnalytics.likes, PostAnalytics.comments, PostAnalytics.shares, PostAnalytics.reach
+        ).join(PostAnalytics, PostAnalytics.post_id == Post.id).filter(Post.status == 'posted')
+
+        daily = defaultdict(lambda: {'likes': 0, 'comments': 0, 'shares': 0, 'reach': 0})
+        hourly = defaultdict(lambda: {'posts': 0, 'engagement': 0})
+        for user_id, posted_at, created_at, last_synced_at, likes, comments, shares, reach in rows.yield_per(1000):
+            posted_at = posted_at or created_at
+            day = daily[(user_id, posted_at.date())]
+            day['likes'] += likes or 0
+            day['comments'] += comments or 0
+            day['shares'] += shares or 0
+            day['reach'] += reach or 0
+            bucket = hourly[(user_id, posted_at.hour)]
+            bucket['posts'] += 1 if last_synced_at else 0
+            bucket['engagement'] += (likes or 0) + (comments or 0) + (shares or 0)
+
+        db.session.bulk_insert_mappings(DailyEngagement, [
+            dict(values, user_id=user_id, date=date) for (user_id, date), values in daily.items()
+        ])
+        db.session.bulk_insert_mappings(HourlyEngagement, [
+            dict(values, user_id=user_id, hour=hour) for (user_id, hour), values in hourly.items()
+        ])
+        db.session.commit()
+        return {'days': len(daily), 'hours': len(hourly)}
+
+    @staticmethod
+    def get_totals(user_id):
+        """Lifetime likes/comments/shares/reach for a user, summed from the daily rollup"""
+        totals = db.session.query(
+            db.func.sum(DailyEngagement.likes),
+            db.func.sum(DailyEngagement.comments),
+            db.func.sum(DailyEngagement.shares),
+            db.func.sum(DailyEngagement.reach)
+        ).filter(DailyEngagement.user_id == user_id).first()
+        return {
+            'likes': totals[0] or 0,
+            'comments': totals[1] or 0,
+            'shares': totals[2] or 0,
+            'reach': totals[3] or 0
+        }
+
+    @staticmethod
+    def get_daily_trend(user_id, days=7):
+        """Engagement of posts published in the last `days` days, by publish day, from the rollup"""
+        since = (datetime.utcnow() - timedelta(days=days)).date()
+        rows = DailyEngagement.query.filter(
+            DailyEngagement.user_id == user_id,
+            DailyEngagement.date >= since
+        ).order_by(DailyEngagement.date).all()
+        return {
+            'dates': [str(row.date) for row in rows],
+            'likes': [row.likes for row in rows],
+            'comments': [row.comments for row in rows],
+            'shares': [row.shares for row in rows]
+        }
+
+
+analytics_service = AnalyticsService()
+
+
+class AnalyticsSyncScheduler:
+    """
+    Incremental analytics refresh driven by post age and engagement velocity.
+
+    Keeps every posted post in a priority queue keyed on its next due sync time.
+    Fresh posts are re-pulled every few minutes, older posts progressively less
+    often; posts that are gaining engagement quickly are pulled twice as often
+    and posts that have stopped changing back off.
+    """
+
+    # (tier name, maximum post age, base sync interval)
+    TIERS = [
+        ('fresh', timedelta(days=1), timedelta(minutes=5)),
+        ('recent', timedelta(days=7), timedelta(minutes=15)),
+        ('week', timedelta(days=30), timedelta(hours=1)),
+        ('month', None, timedelta(days=1)),
+    ]
+    HOT_VELOCITY = 10  # Engagements per hour that mark a post as trending
+    MAX_BACKOFF = 4    # Idle posts are synced at most 4x less often than their tier
+    WATERMARK_LAG = timedelta(minutes=10)  # Re-scan window for posts committed after a later posted_at was seen
+
+    def __init__(self, batch_size=500):
+        self.batch_size = batch_size
+        self._queue = []   # heap of (due_at, post_id)
+        self._posts = {}   # post_id -> state dict
+        self._posted_since = None  # Latest posted_at seen; new posts are loaded from WATERMARK_LAG before it
+
+    def tier_for(self, posted_at, now):
+        """Return (tier name, base interval) for a post of the given age"""
+        age = now - posted_at
+        for name, max_age, interval in self.TIERS:
+            if max_age is None or age < max_age:
+                return name, interval
+
+    def load_new_posts(self, now=None):
+        """Add posts published since the last load to the queue"""
+        now = now or datetime.utcnow()
+        rows = db.session.query(
+            Post.id, Post.user_id, Post.facebook_post_id, Post.posted_at, Post.created_at,
+            PostAnalytics.last_synced_at,
+            PostAnalytics.likes, PostAnalytics.comments, PostAnalytics.shares
+        ).outerjoin(PostAnalytics, PostAnalytics.post_id == Post.id).filter(
+            Post.status == 'posted',
+            Post.facebook_post_id.isnot(None)
+        )
+        if self._posted_since:
+            # A post's posted_at is set before its transaction commits, so rows can show up out of order
+            rows = rows.filter(Post.posted_at >= self._posted_since - self.WATERMARK_LAG)
+        rows = rows.all()
+
+        for row in rows:
+            if row.id in self._posts:
+                continue
+            posted_at = row.posted_at or row.created_at
+            _, interval = self.tier_for(posted_at, now)
+            due_at = row.last_synced_at + interval if row.last_synced_at else now
+
+            self._posts[row.id] = {
+                'user_id': row.user_id,
+                'facebook_post_id': row.facebook_post_id,
+                'posted_at': posted_at,
+                'last_synced_at': row.last_synced_at,
+                'total': (row.likes or 0) + (row.comments or 0) + (row.shares or 0),
+                'interval': interval,
+                'due_at': due_at,
+            }
+            heapq.heappush(self._queue, (due_at, row.id))
+            if row.posted_at and (self._posted_since is None or row.posted_at > self._posted_since):
+                self._posted_since = row.posted_at
+
+        return len(rows)
+
+    def run_once(self, now=None):
+        """Sync every post that is due (up to batch_size) and reschedule it"""
+        now = now or datetime.utcnow()
+        self.load_new_posts(now)
+
+        due = []
+        while self._queue and self._queue[0][0] <= now and len(due) < self.batch_size:
+            _, post_id = heapq.heappop(self._queue)
+            if post_id in self._posts:
+                due.append(post_id)
+
+        if not due:
+            return {'synced': 0, 'errors': 0}
+
+        # Evict posts deleted (or unpublished) since they were queued
+        live = {post_id for (post_id,) in db.session.query(Post.id).filter(
+            Post.id.in_(due),
+            Post.status == 'posted',
+            Post.facebook_post_id.isnot(None)
+        )}
+        for post_id in due:
+            if post_id not in live:
+                del self._posts[post_id]
+        due = [post_id for post_id in due if post_id in live]
+        if not due:
+            return {'synced': 0, 'errors': 0}
+
+        result = analytics_service.sync_posts([
+            (post_id, self._posts[post_id]['user_id'], self._posts[post_id]['facebook_post_id'])
+            for post_id in due
+        ])
+
+        for post_id in due:
+            self._reschedule(post_id, result['metrics'].get(post_id), now)
+
+        return {'synced': result['synced'], 'errors': result['errors']}
+
+    def _reschedule(self, post_id, metrics, now):
+        """Pick the next sync time from the post's tier and how fast it is gaining engagement"""
+        state = self._posts[post_id]
+        _, interval = self.tier_for(state['posted_at'], now)
+
+        if metrics is not None:
+            total = metrics['likes'] + metrics['comments'] + metrics['shares']
+            if state['last_synced_at']:
+                hours = max((now - state['last_synced_at']).total_seconds() / 3600, 1 / 60)
+                velocity = (total - state['total']) / hours
+                if velocity >= self.HOT_VELOCITY:
+                    interval = max(interval / 2, self.TIERS[0][2])
+                elif velocity <= 0:
+                    interval = min(state['interval'] * 2, interval * self.MAX_BACKOFF)
+            state['total'] = total
+            state['last_synced_at'] = now
+
+        state['interval'] = interval
+        state['due_at'] = now + interval
+        heapq.heappush(self._queue, (state['due_at'], post_id))
+
+    def metrics(self, now=None):
+        """Queue depth, number of overdue posts and worst sync lag per tier"""
+        now = now or datetime.utcnow()
+        tiers = {name: {'posts': 0, 'overdue': 0, 'max_lag_seconds': 0} for name, _, _ in self.TIERS}
+
+        for state in self._posts.values():
+            name, _ = self.tier_for(state['posted_at'], now)
+            tier = tiers[name]
+            tier['posts'] += 1
+            lag = (now - state['due_at']).total_seconds()
+            if lag > 0:
+                tier['overdue'] += 1
+                tier['max_lag_seconds'] = max(tier['max_lag_seconds'], int(lag))
+
+        return {
+            'queue_depth': len(self._queue),
+            'overdue': sum(t['overdue'] for t in tiers.values()),
+            'tiers': tiers,
+        }
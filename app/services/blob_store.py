@@ -0,0 +1,181 @@
+"""
+Content-Addressed Blob Store
+Uploads are hashed while they stream to disk and stored once per distinct content
+"""
+import glob
+import hashlib
+import logging
+import os
+import uuid
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Blob
+
+logger = logging.getLogger(__name__)
+
+
+class BlobStore:
+    """
+    Stores each distinct upload once under UPLOAD_FOLDER/blobs/<aa>/<bb>/<sha256><ext>.
+
+    Media and Portfolio rows hold a reference (content_hash) to a Blob row;
+    the file and its derivatives (e.g. <sha256>_thumb.jpg) are removed when
+    the last reference is released and that transaction commits.
+    """
+
+    CHUNK_SIZE = 1024 * 1024
+    PENDING_REMOVALS = 'blob_store_pending_removals'  # Session.info key: [(trash_path, original_path)]
+
+    @property
+    def root(self):
+        return os.path.join(current_app.config['UPLOAD_FOLDER'], 'blobs')
+
+    def blob_path(self, content_hash, ext=''):
+        return os.path.join(self.root, content_hash[:2], content_hash[2:4], f'{content_hash}{ext}')
+
+    def save_stream(self, stream, ext=''):
+        """
+        Write a file-like object to the store, hashing it chunk by chunk.
+
+        Returns (file_path, content_hash, file_size, is_duplicate) and takes a
+        reference on the blob; the caller commits it together with the row that
+        points at the blob.
+        """
+        tmp_dir = os.path.join(self.root, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        tmp_path = os.path.join(tmp_dir, uuid.uuid4().hex)
+
+        digest = hashlib.sha256()
+        file_size = 0
+        try:
+            with open(tmp_path, 'wb') as out:
+                for chunk in iter(lambda: stream.read(self.CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    out.write(chunk)
+                    file_size += len(chunk)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return self.commit_file(tmp_path, digest.hexdigest(), file_size, ext)
+
+    def commit_file(self, tmp_path, content_hash, file_size, ext=''):
+        """Move a fully written, already hashed temp file into the store and take a reference"""
+        # Waits for a concurrent release of the last reference to commit or roll back
+        existing = Blob.query.filter_by(content_hash=content_hash).with_for_update().first()
+        if existing and os.path.exists(existing.file_path):
+            os.remove(tmp_path)
+            file_path = existing.file_path
+            is_duplicate = True
+        else:
+            file_path = existing.file_path if existing else self.blob_path(content_hash, ext.lower())
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            # Atomic; a concurrent upload of the same bytes just replaces identical content
+            os.replace(tmp_path, file_path)
+            is_duplicate = False
+
+        self.acquire(content_hash, file_path, file_size)
+        return file_path, content_hash, file_size, is_duplicate
+
+    @staticmethod
+    def acquire(content_hash, file_path, file_size=None):
+        """Increment a blob's reference count, creating its row on first use"""
+        updated = Blob.query.filter_by(content_hash=content_hash).update(
+            {Blob.ref_count: Blob.ref_count + 1}, synchronize_session=False
+        )
+        if updated:
+            return
+
+        try:
+            with db.session.begin_nested():
+                db.session.add(Blob(
+                    content_hash=content_hash,
+                    file_path=file_path,
+                    file_size=file_size,
+                    ref_count=1
+                ))
+        except IntegrityError:
+            # Another upload of the same content inserted the row first
+            Blob.query.filter_by(content_hash=content_hash).update(
+                {Blob.ref_count: Blob.ref_count + 1}, synchronize_session=False
+            )
+
+    def release(self, content_hash):
+        """
+        Drop one reference; deletes the Blob row with the last one.
+
+        Runs in the caller's transaction. The file and its derivatives are
+        moved aside right away, so a concurrent upload of the same content
+        writes a fresh copy, and are deleted only once the caller commits;
+        on rollback they are moved back.
+        """
+        Blob.query.filter_by(content_hash=content_hash).update(
+            {Blob.ref_count: Blob.ref_count - 1}, synchronize_session=False
+        )
+        blob = Blob.query.filter_by(content_hash=content_hash).with_for_update().first()
+        if not blob or blob.ref_count > 0:
+            return False
+
+        pending = db.session.info.setdefault(self.PENDING_REMOVALS, [])
+        pending.extend(self._move_aside(blob.file_path))
+        db.session.delete(blob)
+        return True
+
+    def _move_aside(self, file_path):
+        """Rename a blob file and its derivatives into tmp/; returns (trash_path, original_path) pairs"""
+        tmp_dir = os.path.join(self.root, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        base = os.path.splitext(file_path)[0]
+        moved = []
+        for path in [file_path] + glob.glob(f'{glob.escape(base)}_*'):
+            trash_path = os.path.join(tmp_dir, f'{uuid.uuid4().hex}.deleted')
+            try:
+                os.replace(path, trash_path)
+            except FileNotFoundError:
+                continue
+            moved.append((trash_path, path))
+        return moved
+
+    @staticmethod
+    def remove_files(file_path):
+        """Remove a blob file and every derivative stored next to it"""
+        base = os.path.splitext(file_path)[0]
+        for path in [file_path] + glob.glob(f'{glob.escape(base)}_*'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not remove blob file {path}: {e}")
+
+
+
+@event.listens_for(Session, 'after_commit')
+def _remove_released_files(session):
+    if session.in_nested_transaction():
+        return  # Savepoint; the outer transaction may still roll back
+    for trash_path, _ in session.info.pop(BlobStore.PENDING_REMOVALS, []):
+        try:
+            os.remove(trash_path)
+        except OSError as e:
+            logger.warning(f"Could not remove blob file {trash_path}: {e}")
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _restore_released_files(session, transaction):
+    # Anything still pending when the outer transaction ends was rolled back (or the session closed)
+    if transaction.parent is not None:
+        return
+    for trash_path, original_path in session.info.pop(BlobStore.PENDING_REMOVALS, []):
+        try:
+            # A concurrent upload may have written the same content back already
+            os.replace(trash_path, original_path)
+        except OSError as e:
+            logger.warning(f"Could not restore blob file {original_path}: {e}")
+
+
+blob_store = BlobStore()
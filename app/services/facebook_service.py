@@ -1,6 +1,11 @@
+import json
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
 from requests_oauthlib import OAuth2Session
-from flask import current_app
+from urllib3.util.retry import Retry
+from flask import current_app, has_app_context
 
 class FacebookService:
     """Handle Facebook OAuth and Graph API operations including long-lived page tokens"""
@@ -9,8 +14,102 @@ class FacebookService:
     FACEBOOK_TOKEN_URL = 'https://graph.facebook.com/v18.0/oauth/access_token'
     FACEBOOK_GRAPH_API = 'https://graph.facebook.com/v18.0'
     
+    # Graph API error codes for throttled requests (the request was not processed)
+    RATE_LIMIT_ERROR_CODES = {4, 17, 32, 613}
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+    
+    # Graph API accepts at most 50 requests per batch call
+    GRAPH_BATCH_LIMIT = 50
+    POST_ANALYTICS_FIELDS = 'shares,likes.summary(true),comments.summary(true),type,status_type,message'
+    
+    HTTP_SETTINGS = (
+        'FACEBOOK_CONNECT_TIMEOUT', 'FACEBOOK_READ_TIMEOUT', 'FACEBOOK_POOL_SIZE',
+        'FACEBOOK_MAX_RETRIES', 'FACEBOOK_RETRY_BACKOFF'
+    )
+    
     def __init__(self):
-        pass
+        self._settings = {}
+        self._session = None
+        self._session_lock = threading.Lock()
+    
+    def init_app(self, app):
+        """Capture HTTP client settings so calls made from worker threads can use them"""
+        self._settings = {key: app.config[key] for key in self.HTTP_SETTINGS if key in app.config}
+    
+    def _setting(self, key, default):
+        if key in self._settings:
+            return self._settings[key]
+        if has_app_context():
+            return current_app.config.get(key, default)
+        return default
+    
+    @property
+    def timeout(self):
+        """(connect, read) timeout tuple used for every Graph API call"""
+        return (
+            self._setting('FACEBOOK_CONNECT_TIMEOUT', 5),
+            self._setting('FACEBOOK_READ_TIMEOUT', 30)
+        )
+    
+    @property
+    def session(self):
+        """Shared keep-alive session, created once per process and safe to use from threads"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+    
+    def _create_session(self):
+        """Build a pooled session that retries connection errors and 5xx/429 responses"""
+        # urllib3 only retries statuses for idempotent methods, so a POST that reached
+        # Facebook is never sent twice; connection failures are retried for all methods.
+        retry = Retry(
+            total=self._setting('FACEBOOK_MAX_RETRIES', 3),
+            read=False,
+            backoff_factor=self._setting('FACEBOOK_RETRY_BACKOFF', 0.5),
+            status_forcelist=self.RETRY_STATUS_CODES,
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=self._setting('FACEBOOK_POOL_SIZE', 20),
+            max_retries=retry
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+    
+    def _request(self, method, url, **kwargs):
+        """Send a request through the pooled session, backing off on Graph API rate limits"""
+        kwargs.setdefault('timeout', self.timeout)
+        max_retries = self._setting('FACEBOOK_MAX_RETRIES', 3)
+        backoff = self._setting('FACEBOOK_RETRY_BACKOFF', 0.5)
+        
+        for attempt in range(max_retries + 1):
+            response = self.session.request(method, url, **kwargs)
+            if attempt == max_retries or not self._is_rate_limited(response):
+                return response
+            time.sleep(backoff * (2 ** attempt))
+        return response
+    
+    def _is_rate_limited(self, response):
+        """Check a Graph API error response for a throttling error code"""
+        if response.status_code < 400:
+            return False
+        try:
+            error = response.json().get('error', {})
+        except ValueError:
+            return False
+        return error.get('code') in self.RATE_LIMIT_ERROR_CODES
+    
+    def _get(self, url, **kwargs):
+        return self._request('GET', url, **kwargs)
+    
+    def _post(self, url, **kwargs):
+        return self._request('POST', url, **kwargs)
     
     def get_oauth_session(self, redirect_uri=None):
         """Create OAuth2 session for Facebook"""
@@ -38,7 +137,7 @@ class FacebookService:
             redirect_uri = current_app.config['FACEBOOK_REDIRECT_URI']
         
         try:
-            response = requests.post(
+            response = self._post(
                 self.FACEBOOK_TOKEN_URL,
                 data={
                     'client_id': current_app.config['FACEBOOK_APP_ID'],
@@ -55,7 +154,7 @@ class FacebookService:
     def get_user_info(self, access_token):
         """Get Facebook user information"""
         try:
-            response = requests.get(
+            response = self._get(
                 f'{self.FACEBOOK_GRAPH_API}/me',
                 params={
                     'fields': 'id,email,name,picture',
@@ -70,7 +169,7 @@ class FacebookService:
     def get_user_pages(self, access_token):
         """Get pages the user manages (with page access tokens)"""
         try:
-            response = requests.get(
+            response = self._get(
                 f'{self.FACEBOOK_GRAPH_API}/me/accounts',
                 params={
                     'fields': 'id,name,picture,access_token',
@@ -86,7 +185,7 @@ class FacebookService:
     def get_business_accounts(self, access_token):
         """Get user's business accounts"""
         try:
-            response = requests.get(
+            response = self._get(
                 f'{self.FACEBOOK_GRAPH_API}/me/businesses',
                 params={
                     'fields': 'id,name,picture',
@@ -110,7 +209,7 @@ class FacebookService:
             "fb_exchange_token": short_lived_token
         }
         try:
-            resp = requests.get(url, params=params)
+            resp = self._get(url, params=params)
             resp.raise_for_status()
             return resp.json().get("access_token")
         except requests.exceptions.RequestException as e:
@@ -126,7 +225,7 @@ class FacebookService:
 
         # Step 2: Call /me/accounts to get page token
         try:
-            response = requests.get(
+            response = self._get(
                 f"{self.FACEBOOK_GRAPH_API}/me/accounts",
                 params={
                     "fields": "id,name,access_token",
@@ -149,7 +248,7 @@ class FacebookService:
     def get_pages(self, business_account_id, access_token):
         """Get pages for a business account"""
         try:
-            response = requests.get(
+            response = self._get(
                 f'{self.FACEBOOK_GRAPH_API}/{business_account_id}/pages',
                 params={
                     'fields': 'id,name,picture',
@@ -167,7 +266,7 @@ class FacebookService:
             data = {'message': message, 'access_token': page_access_token}
             if image_url:
                 data['url'] = image_url
-            response = requests.post(f'{self.FACEBOOK_GRAPH_API}/{page_id}/feed', data=data)
+            response = self._post(f'{self.FACEBOOK_GRAPH_API}/{page_id}/feed', data=data)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -183,7 +282,7 @@ class FacebookService:
             }
             if image_url:
                 data['url'] = image_url
-            response = requests.post(f'{self.FACEBOOK_GRAPH_API}/{page_id}/feed', data=data)
+            response = self._post(f'{self.FACEBOOK_GRAPH_API}/{page_id}/feed', data=data)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -192,10 +291,10 @@ class FacebookService:
     def get_post_analytics(self, post_id, page_access_token):
         """Get analytics for a posted item using PAGE ACCESS TOKEN."""
         try:
-            response = requests.get(
+            response = self._get(
                 f'{self.FACEBOOK_GRAPH_API}/{post_id}',
                 params={
-                    'fields': 'shares,likes.summary(true),comments.summary(true),type,status_type,message',
+                    'fields': self.POST_ANALYTICS_FIELDS,
                     'access_token': page_access_token
                 }
             )
@@ -203,6 +302,63 @@ class FacebookService:
             return response.json()
         except requests.exceptions.RequestException as e:
             raise Exception(f'Failed to get post analytics: {str(e)}')
+    
+    def get_posts_analytics_batch(self, post_ids, page_access_token):
+        """
+        Get analytics for many posts using Graph API batch requests (50 posts per call).
+        
+        A failure for one post does not affect the others in the same batch.
+        
+        Returns:
+            dict: {post_id: {'data': dict} or {'error': str}}
+        """
+        results = {}
+        post_ids = list(post_ids)
+        
+        for start in range(0, len(post_ids), self.GRAPH_BATCH_LIMIT):
+            chunk = post_ids[start:start + self.GRAPH_BATCH_LIMIT]
+            batch = [{
+                'method': 'GET',
+                'relative_url': f'{post_id}?fields={self.POST_ANALYTICS_FIELDS}'
+            } for post_id in chunk]
+            
+            try:
+                response = self._post(
+                    self.FACEBOOK_GRAPH_API,
+                    data={
+                        'access_token': page_access_token,
+                        'batch': json.dumps(batch),
+                        'include_headers': 'false'
+                    }
+                )
+                response.raise_for_status()
+                items = response.json()
+            except (requests.exceptions.RequestException, ValueError) as e:
+                for post_id in chunk:
+                    results[post_id] = {'error': f'Batch request failed: {str(e)}'}
+                continue
+            
+            for post_id, item in zip(chunk, items):
+                results[post_id] = self._parse_batch_item(item)
+        
+        return results
+    
+    @staticmethod
+    def _parse_batch_item(item):
+        """Turn one entry of a Graph batch response into {'data': ...} or {'error': ...}"""
+        # Graph returns null for requests it did not complete in time
+        if not item:
+            return {'error': 'No response (batch item timed out)'}
+        
+        try:
+            body = json.loads(item.get('body') or '{}')
+        except ValueError:
+            return {'error': f"Invalid response body (HTTP {item.get('code')})"}
+        
+        if item.get('code') != 200 or 'error' in body:
+            message = body.get('error', {}).get('message') or f"HTTP {item.get('code')}"
+            return {'error': message}
+        return {'data': body}
 
 
 # Create a singleton instance
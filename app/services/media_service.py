@@ -1,7 +1,19 @@
-from PIL import Image
+from PIL import Image, ImageOps
+import base64
+import json
+import logging
 import os
+import subprocess
+from datetime import datetime
 from flask import current_app
+from sqlalchemy import tuple_
+from sqlalchemy.orm import load_only
 import mimetypes
+from werkzeug.utils import secure_filename
+from app import db
+from app.services.task_queue import task_queue
+
+logger = logging.getLogger(__name__)
 
 class MediaService:
     """Handle media uploads and processing"""
@@ -10,6 +22,11 @@ class MediaService:
     ALLOWED_VIDEO_EXTENSIONS = {'.mp4', '.mov', '.avi', '.mkv', '.webm'}
     ALLOWED_PORTFOLIO_EXTENSIONS = {'.pdf', '.docx', '.doc', '.txt', '.jpg', '.jpeg', '.png'}
     
+    # Columns the media pickers/list APIs serialize
+    LIST_COLUMNS = ('id', 'filename', 'media_type', 'title', 'width', 'height', 'duration',
+                    'derivatives', 'processing_status', 'created_at')
+    MAX_PAGE_SIZE = 200
+    
     @staticmethod
     def allowed_file(filename, file_type='image'):
         """Check if file extension is allowed"""
@@ -65,23 +82,291 @@ class MediaService:
             return None, None
     
     @staticmethod
-    def save_uploaded_file(file, user_id, file_type='image'):
-        """Save uploaded file to disk"""
+    def encode_cursor(media):
+        """Opaque keyset cursor for the (created_at, id) position of a row"""
+        raw = f'{media.created_at.isoformat()}|{media.id}'
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+    
+    @staticmethod
+    def decode_cursor(cursor):
         try:
-            # Create user upload directory
-            upload_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], str(user_id))
-            os.makedirs(upload_dir, exist_ok=True)
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+            created_at, media_id = raw.rsplit('|', 1)
+            return datetime.fromisoformat(created_at), int(media_id)
+        except Exception:
+            raise Exception('Invalid cursor')
+    
+    @staticmethod
+    def list_media(user_id, media_type=None, cursor=None, limit=50):
+        """
+        One page of a user's media, newest first, as (items, next_cursor).
+        
+        Keyset pagination on (created_at, id): each page is an index range
+        scan on (user_id, created_at) / (user_id, media_type, created_at), so
+        its cost does not grow with the size of the library or the page
+        number. Only LIST_COLUMNS are loaded.
+        """
+        from app.models import Media
+        
+        limit = max(1, min(limit, MediaService.MAX_PAGE_SIZE))
+        query = Media.query.options(
+            load_only(*(getattr(Media, column) for column in MediaService.LIST_COLUMNS))
+        ).filter(Media.user_id == user_id)
+        
+        if media_type in ['image', 'video']:
+            query = query.filter(Media.media_type == media_type)
+        
+        if cursor:
+            created_at, media_id = MediaService.decode_cursor(cursor)
+            query = query.filter(tuple_(Media.created_at, Media.id) < (created_at, media_id))
+        
+        items = query.order_by(Media.created_at.desc(), Media.id.desc()).limit(limit + 1).all()
+        next_cursor = MediaService.encode_cursor(items[limit - 1]) if len(items) > limit else None
+        return items[:limit], next_cursor
+    
+    @staticmethod
+    def generate_image_derivatives(file_path, sizes, quality=85):
+        """
+        Decode an image once and write every derivative size as a JPEG.
+        
+        sizes maps a derivative name to its (max width, max height) box;
+        each file is stored next to the original as <base>_<name>.jpg. Sizes
+        are produced largest first, each one downscaled from the previous
+        instead of from the full-resolution original. Runs in the process
+        pool, so it only takes and returns plain values.
+        """
+        base = os.path.splitext(file_path)[0]
+        outputs = {name: f'{base}_{name}.jpg' for name in sizes}
+        
+        with Image.open(file_path) as img:
+            width, height = img.size
+            missing = [name for name, path in outputs.items() if not os.path.exists(path)]
+            if not missing:
+                # Shared blob already processed for an earlier upload
+                return {'width': width, 'height': height, 'derivatives': outputs}
             
-            # Generate unique filename
-            import time
-            ext = os.path.splitext(file.filename)[1].lower()
-            filename = f"{int(time.time())}_{file.filename.replace(' ', '_')}"
-            file_path = os.path.join(upload_dir, filename)
+            # JPEGs are decoded directly at 1/2, 1/4 or 1/8 scale when that still covers the largest box
+            largest = max(max(sizes[name]) for name in missing)
+            img.draft('RGB', (largest, largest))
+            
+            source = ImageOps.exif_transpose(img)
+            if source.mode not in ('RGB', 'L'):
+                source = source.convert('RGB')
+            
+            for name in sorted(missing, key=lambda n: sizes[n][0] * sizes[n][1], reverse=True):
+                resized = source.copy()
+                resized.thumbnail(sizes[name], Image.LANCZOS)
+                
+                tmp_path = f'{outputs[name]}.{os.getpid()}.tmp'
+                resized.save(tmp_path, 'JPEG', quality=quality, optimize=True)
+                os.replace(tmp_path, outputs[name])
+                source = resized
+        
+        return {'width': width, 'height': height, 'derivatives': outputs}
+    
+    @staticmethod
+    def probe_video(file_path, ffprobe='ffprobe', timeout=60):
+        """Read duration and display width/height of a video's first video stream with ffprobe"""
+        result = subprocess.run(
+            [ffprobe, '-v', 'error', '-select_streams', 'v:0',
+             '-show_entries', 'format=duration:stream=width,height,duration:stream_tags=rotate:stream_side_data=rotation',
+             '-of', 'json', file_path],
+            capture_output=True, check=True, timeout=timeout
+        )
+        info = json.loads(result.stdout or b'{}')
+        stream = (info.get('streams') or [{}])[0]
+        
+        width, height = stream.get('width'), stream.get('height')
+        rotation = stream.get('tags', {}).get('rotate')
+        for side_data in stream.get('side_data_list', []):
+            rotation = side_data.get('rotation', rotation)
+        if rotation is not None and int(float(rotation)) % 180:
+            # Phone videos are often stored landscape with a 90 degree display rotation
+            width, height = height, width
+        
+        duration = info.get('format', {}).get('duration') or stream.get('duration')
+        return {
+            'width': width,
+            'height': height,
+            'duration': float(duration) if duration not in (None, 'N/A') else None
+        }
+    
+    @staticmethod
+    def extract_poster_frame(file_path, offset=1.0, ffmpeg='ffmpeg', timeout=60):
+        """Write one frame of a video to <base>_poster.jpg, falling back to the first frame for short clips"""
+        poster_path = os.path.splitext(file_path)[0] + '_poster.jpg'
+        if os.path.exists(poster_path):
+            return poster_path
+        
+        errors = []
+        for seek in dict.fromkeys((offset, 0)):
+            # A seek past the end makes ffmpeg exit non-zero; that is what the frame 0 retry is for
+            result = subprocess.run(
+                [ffmpeg, '-v', 'error', '-nostdin', '-y', '-ss', str(seek), '-i', file_path,
+                 '-frames:v', '1', '-q:v', '2', poster_path],
+                capture_output=True, timeout=timeout
+            )
+            if result.returncode == 0 and os.path.exists(poster_path) and os.path.getsize(poster_path):
+                return poster_path
+            stderr = result.stderr.decode('utf-8', 'replace').strip()
+            errors.append(f'at {seek}s: {stderr or f"exit code {result.returncode}"}')
+        
+        raise Exception(f'No video frame could be decoded ({"; ".join(errors)})')
+    
+    @staticmethod
+    def generate_video_derivatives(file_path, sizes, quality=85, ffmpeg='ffmpeg', ffprobe='ffprobe',
+                                   poster_offset=1.0, timeout=60):
+        """
+        Probe a video and render its poster frame plus the image derivative sizes of that frame.
+        
+        Uses only local ffprobe/ffmpeg binaries; runs in the process pool.
+        """
+        info = MediaService.probe_video(file_path, ffprobe, timeout)
+        if info['duration']:
+            poster_offset = min(poster_offset, info['duration'] / 2)
+        
+        poster_path = MediaService.extract_poster_frame(file_path, poster_offset, ffmpeg, timeout)
+        poster = MediaService.generate_image_derivatives(poster_path, sizes, quality)
+        
+        info['derivatives'] = dict(poster['derivatives'], poster=poster_path)
+        info['width'] = info['width'] or poster['width']
+        info['height'] = info['height'] or poster['height']
+        return info
+    
+    @staticmethod
+    def create_media(user_id, file_path, filename, content_hash, is_duplicate, title=None, description=''):
+        """
+        Create the Media row for a file already in the blob store and queue its processing.
+        
+        Derivatives already generated for the same content are reused.
+        """
+        from app.models import Media, User
+        from app.services.blob_store import blob_store
+        from app.services.quota_service import quota_service, QuotaExceeded
+        from app.services.stats_service import stats_service
+        
+        media_type = MediaService.get_file_type(filename)
+        media = Media(
+            user_id=user_id,
+            filename=filename,
+            file_path=file_path,
+            content_hash=content_hash,
+            media_type=media_type,
+            file_extension=os.path.splitext(filename)[1].lower(),
+            file_size=os.path.getsize(file_path),
+            title=title or filename,
+            description=description or ''
+        )
+        
+        processed = Media.query.filter(
+            Media.content_hash == content_hash,
+            Media.processing_status == 'ready'
+        ).first() if is_duplicate else None
+        
+        if processed:
+            media.width = processed.width
+            media.height = processed.height
+            media.duration = processed.duration
+            media.derivatives = processed.derivatives
+            media.thumbnail_path = processed.thumbnail_path
+            media.processing_status = 'ready'
+        else:
+            media.processing_status = 'pending'
+        
+        db.session.add(media)
+        try:
+            quota_service.consume(db.session.get(User, user_id), 'media_storage_gb', media.file_size)
+        except QuotaExceeded:
+            # The caller rolls back the blob reference; a file only this upload wrote goes with it
+            if not is_duplicate:
+                blob_store.remove_files(file_path)
+            raise
+        db.session.commit()
+        stats_service.invalidate(user_id)
+        
+        # Resize in the background; the grid falls back to the original until ready
+        if media.processing_status == 'pending':
+            MediaService.enqueue_processing(media.id)
+        
+        return media
+    
+    @staticmethod
+    def enqueue_processing(media_id):
+        """Queue derivative generation for an uploaded media item"""
+        return task_queue.submit(MediaService.process_media, media_id)
+    
+    @staticmethod
+    def process_media(media_id):
+        """
+        Background job: generate a media item's derivatives in the process pool.
+        
+        Drives Media.processing_status: pending -> processing -> ready/failed
+        """
+        from app.models import Media
+        
+        media = db.session.get(Media, media_id)
+        if not media or media.processing_status not in ('pending', 'processing'):
+            return None
+        
+        media.processing_status = 'processing'
+        db.session.commit()
+        
+        try:
+            timeout = current_app.config['MEDIA_PROCESSING_TIMEOUT']
+            
+            sizes = dict(current_app.config['MEDIA_DERIVATIVE_SIZES'])
+            quality = current_app.config['MEDIA_DERIVATIVE_QUALITY']
+            
+            if media.media_type == 'image':
+                result = task_queue.run_in_process(
+                    MediaService.generate_image_derivatives, media.file_path, sizes, quality
+                ).result(timeout=timeout)
+            elif media.media_type == 'video':
+                result = task_queue.run_in_process(
+                    MediaService.generate_video_derivatives,
+                    media.file_path,
+                    sizes,
+                    quality,
+                    current_app.config['FFMPEG_BINARY'],
+                    current_app.config['FFPROBE_BINARY'],
+                    current_app.config['VIDEO_POSTER_OFFSET'],
+                    timeout
+                ).result(timeout=timeout)
+                media.duration = result['duration']
+            else:
+                result = None
+            
+            if result:
+                media.width = result['width']
+                media.height = result['height']
+                media.derivatives = result['derivatives']
+                media.thumbnail_path = result['derivatives'].get('thumb')
             
-            # Save file
-            file.save(file_path)
+            media.processing_status = 'ready'
+        except Exception as e:
+            media.processing_status = 'failed'
+            logger.error(f'Error processing media {media_id}: {e}')
+        
+        db.session.commit()
+        return media.processing_status
+    
+    @staticmethod
+    def save_uploaded_file(file, file_type='image'):
+        """
+        Save an uploaded file to the content-addressed blob store.
+        
+        Identical uploads share one file on disk. Returns
+        (file_path, filename, content_hash, is_duplicate); the blob reference is
+        committed with the caller's Media/Portfolio row.
+        """
+        from app.services.blob_store import blob_store
+        
+        try:
+            ext = os.path.splitext(file.filename)[1].lower()
+            filename = secure_filename(file.filename) or f'upload{ext}'
+            file_path, content_hash, _, is_duplicate = blob_store.save_stream(file.stream, ext)
             
-            return file_path, filename
+            return file_path, filename, content_hash, is_duplicate
         except Exception as e:
             raise Exception(f'Error saving file: {str(e)}')
 
@@ -0,0 +1,73 @@
+"""
+Facebook Page Service
+Keeps the FacebookPage rows for a user in step with /me/accounts
+"""
+import logging
+from sqlalchemy.orm import undefer
+from app import db
+from app.models import FacebookPage
+
+logger = logging.getLogger(__name__)
+
+
+class PageService:
+    """Per-user Facebook pages, looked up by (user_id, page_id)"""
+
+    @staticmethod
+    def _fields(page):
+        """Column values for one /me/accounts entry"""
+        return {
+            'name': page.get('name'),
+            'picture_url': ((page.get('picture') or {}).get('data') or {}).get('url'),
+            'access_token': page.get('access_token')
+        }
+
+    def sync_pages(self, user, pages):
+        """
+        Upsert the user's pages from a /me/accounts response (caller commits).
+
+        Only new pages are inserted and only pages whose name, picture or
+        token changed are updated; pages no longer in the response are
+        removed. Returns (inserted, updated, deleted) counts.
+        """
+        existing = {
+            page.page_id: page
+            for page in FacebookPage.query.filter_by(user_id=user.id).options(undefer(FacebookPage.access_token))
+        }
+        inserted = updated = 0
+
+        for data in pages:
+            page_id = data.get('id')
+            if not page_id:
+                continue
+            fields = self._fields(data)
+            page = existing.pop(page_id, None)
+            if page is None:
+                db.session.add(FacebookPage(user_id=user.id, page_id=page_id, **fields))
+                inserted += 1
+                continue
+            changed = {name: value for name, value in fields.items() if getattr(page, name) != value}
+            for name, value in changed.items():
+                setattr(page, name, value)
+            updated += bool(changed)
+
+        for page in existing.values():
+            db.session.delete(page)
+
+        return inserted, updated, len(existing)
+
+    @staticmethod
+    def get_page(user_id, page_id, with_token=False):
+        """One of the user's pages by Facebook page ID, or None"""
+        query = FacebookPage.query.filter_by(user_id=user_id, page_id=page_id)
+        if with_token:
+            query = query.options(undefer(FacebookPage.access_token))
+        return query.first()
+
+    @staticmethod
+    def list_pages(user_id):
+        """The user's pages for pickers (tokens not loaded)"""
+        return FacebookPage.query.filter_by(user_id=user_id).order_by(FacebookPage.name).all()
+
+
+page_service = PageService()
@@ -0,0 +1,71 @@
+"""
+Plan Catalog
+Process-wide cache of the (rarely changing) subscription plans
+"""
+import threading
+import time
+from flask import current_app
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Plan
+
+
+class PlanCatalog:
+    """
+    Keeps every Plan row in memory for PLAN_CATALOG_TTL seconds.
+
+    Plans are stored detached from any session and handed out with
+    session.merge(load=False), which attaches a copy to the caller's session
+    without a SELECT. seed_plans.py (the only writer) calls invalidate();
+    other processes pick up changes when the TTL expires.
+    """
+
+    def __init__(self):
+        self._plans = None  # (expires_at, {id: Plan}, {name: Plan})
+        self._lock = threading.Lock()
+
+    def _load(self):
+        now = time.monotonic()
+        cached = self._plans
+        if cached and cached[0] > now:
+            return cached
+
+        with self._lock:
+            cached = self._plans
+            if cached and cached[0] > now:
+                return cached
+
+            # Own short-lived session, so rows the caller already holds are never detached
+            with Session(db.engine) as session:
+                plans = session.query(Plan).order_by(Plan.display_order).all()
+                session.expunge_all()
+            cached = (
+                now + current_app.config['PLAN_CATALOG_TTL'],
+                {plan.id: plan for plan in plans},
+                {plan.name: plan for plan in plans}
+            )
+            self._plans = cached
+            return cached
+
+    @staticmethod
+    def _attach(plan):
+        return db.session.merge(plan, load=False) if plan is not None else None
+
+    def get(self, plan_id):
+        """Plan by id, or None"""
+        return self._attach(self._load()[1].get(plan_id))
+
+    def get_by_name(self, name):
+        """Plan by name ('free', 'pro', ...), or None"""
+        return self._attach(self._load()[2].get(name))
+
+    def active_plans(self):
+        """Active plans in pricing-page order"""
+        return [self._attach(plan) for plan in self._load()[1].values() if plan.is_active]
+
+    def invalidate(self):
+        with self._lock:
+            self._plans = None
+
+
+plan_catalog = PlanCatalog()
@@ -0,0 +1,210 @@
+"""
+Portfolio Index
+Splits portfolio text into passages with TF-IDF vectors and picks passages for AI prompts
+"""
+import logging
+import math
+import re
+from collections import Counter
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import PortfolioChunk
+
+logger = logging.getLogger(__name__)
+
+
+class PortfolioIndex:
+    """
+    Passage index over Portfolio.extracted_text.
+
+    The text is split once, when it is extracted, into passages of about
+    PORTFOLIO_CHUNK_CHARS, each stored with its top TF-IDF terms. A prompt
+    then gets PORTFOLIO_CONTEXT_CHARS of passages chosen by maximal marginal
+    relevance: central to the document (and to the post's angle, if any) but
+    unlike the passages already picked, so the model sees the whole document
+    instead of its opening.
+    """
+
+    TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9'&-]*[a-z0-9]")
+    PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+    SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+    STOP_WORDS = frozenset("""
+        about above after again against all also am an and any are as at be because been before being below
+        between both but by can could did do does doing down during each few for from further had has have
+        having he her here hers him his how if in into is it its itself just me more most my no nor not now
+        of off on once only or other our ours out over own same she should so some such than that the their
+        theirs them then there these they this those through to too under until up very was we were what
+        when where which while who whom why will with would you your yours
+    """.split())
+
+    MMR_LAMBDA = 0.7  # Relevance vs. novelty when picking passages
+    REUSE_PENALTY = 0.15  # Per earlier prompt in the batch that already used a passage
+    CANDIDATES = 200  # Most relevant passages considered for each prompt
+
+    @classmethod
+    def tokenize(cls, text):
+        return [token for token in cls.TOKEN_PATTERN.findall(text.lower()) if token not in cls.STOP_WORDS]
+
+    @classmethod
+    def split(cls, text, chunk_chars):
+        """Pack paragraphs (or their sentences, if too long) into passages of at most chunk_chars"""
+        pieces = []
+        for paragraph in cls.PARAGRAPH_BREAK.split(text):
+            paragraph = ' '.join(paragraph.split())
+            if len(paragraph) <= chunk_chars:
+                pieces.append(paragraph)
+                continue
+            for sentence in cls.SENTENCE_END.split(paragraph):
+                while len(sentence) > chunk_chars:
+                    cut = sentence.rfind(' ', 0, chunk_chars)
+                    cut = cut if cut > 0 else chunk_chars
+                    pieces.append(sentence[:cut])
+                    sentence = sentence[cut:].lstrip()
+                pieces.append(sentence)
+
+        chunks = []
+        current = ''
+        for piece in filter(None, pieces):
+            if current and len(current) + 1 + len(piece) > chunk_chars:
+                chunks.append(current)
+                current = piece
+            else:
+                current = f'{current} {piece}' if current else piece
+        if current:
+            chunks.append(current)
+        return chunks
+
+    @staticmethod
+    def _normalize(weights, max_terms=None):
+        if max_terms:
+            weights = dict(sorted(weights.items(), key=lambda item: (-item[1], item[0]))[:max_terms])
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        return {term: round(weight / norm, 4) for term, weight in weights.items()} if norm else {}
+
+    @classmethod
+    def build(cls, text, chunk_chars, max_terms):
+        """
+        Split text and weight each passage's terms by TF-IDF across the document.
+
+        Database-free so it can run in the process pool; returns a list of
+        (content, terms) tuples in document order.
+        """
+        chunks = cls.split(text or '', chunk_chars)
+        counts = [Counter(cls.tokenize(chunk)) for chunk in chunks]
+        document_frequency = Counter(term for terms in counts for term in terms)
+        total = len(chunks)
+
+        built = []
+        for chunk, terms in zip(chunks, counts):
+            weights = {
+                term: (1 + math.log(count)) * (math.log((1 + total) / (1 + document_frequency[term])) + 1)
+                for term, count in terms.items()
+            }
+            built.append((chunk, cls._normalize(weights, max_terms)))
+        return built
+
+    def index_portfolio(self, portfolio, built=None):
+        """Replace the portfolio's passages (caller commits); built is a precomputed build() result"""
+        if built is None:
+            config = current_app.config
+            built = self.build(portfolio.extracted_text, config['PORTFOLIO_CHUNK_CHARS'], config['PORTFOLIO_CHUNK_TERMS'])
+
+        PortfolioChunk.query.filter_by(portfolio_id=portfolio.id).delete(synchronize_session=False)
+        db.session.add_all([
+            PortfolioChunk(portfolio_id=portfolio.id, position=position, content=content, terms=terms)
+            for position, (content, terms) in enumerate(built)
+        ])
+        return len(built)
+
+    def chunks(self, portfolio):
+        """The portfolio's passages, indexing it first if it predates the index"""
+        query = PortfolioChunk.query.filter_by(portfolio_id=portfolio.id).order_by(PortfolioChunk.position)
+        chunks = query.all()
+        if not chunks and portfolio.extracted_text:
+            try:
+                count = self.index_portfolio(portfolio)
+                db.session.commit()
+                logger.info(f'Indexed portfolio {portfolio.id} on first use: {count} passages')
+            except IntegrityError:
+                # The extraction job indexed it at the same time
+                db.session.rollback()
+            chunks = query.all()
+        return chunks
+
+    @staticmethod
+    def _similarity(a, b):
+        if len(a) > len(b):
+            a, b = b, a
+        return sum(weight * b.get(term, 0.0) for term, weight in a.items())
+
+    def _select(self, chunks, centroid, budget, query=None, used=None):
+        """Positions of the passages picked for one prompt"""
+        query_terms = self._normalize(Counter(self.tokenize(query))) if query else {}
+        relevance = {}
+        for chunk in chunks:
+            score = self._similarity(chunk.terms, centroid)
+            if query_terms:
+                score += self._similarity(chunk.terms, query_terms)
+            if used:
+                score -= self.REUSE_PENALTY * used[chunk.position]
+            relevance[chunk.position] = score
+
+        # Highest similarity to any passage picked so far, updated as passages are picked
+        redundancy = dict.fromkeys(relevance, 0.0)
+
+        def mmr(chunk):
+            return self.MMR_LAMBDA * relevance[chunk.position] - (1 - self.MMR_LAMBDA) * redundancy[chunk.position]
+
+        selected = []
+        remaining = budget
+        candidates = sorted(chunks, key=lambda chunk: relevance[chunk.position], reverse=True)[:self.CANDIDATES]
+        while candidates and remaining > 0:
+            fitting = [chunk for chunk in candidates if len(chunk.content) <= remaining]
+            if not fitting:
+                if not selected:
+                    # Only oversized passages; the best one is truncated by the caller
+                    selected.append(max(candidates, key=mmr))
+                break
+            best = max(fitting, key=mmr)
+            selected.append(best)
+            candidates.remove(best)
+            remaining -= len(best.content) + 2
+            for chunk in candidates:
+                redundancy[chunk.position] = max(redundancy[chunk.position], self._similarity(chunk.terms, best.terms))
+        return sorted(chunk.position for chunk in selected)
+
+    def contexts(self, portfolio, queries, budget=None):
+        """
+        Portfolio text for a batch of prompts, one per query (a post angle, or None).
+
+        Each context is at most budget characters of whole passages in
+        document order. Passages already given to earlier prompts in the
+        batch are penalized, so a batch covers more of the document.
+        """
+        budget = budget or current_app.config['PORTFOLIO_CONTEXT_CHARS']
+        chunks = self.chunks(portfolio)
+        if sum(len(chunk.content) + 2 for chunk in chunks) <= budget + 2:
+            text = '\n\n'.join(chunk.content for chunk in chunks)
+            return [text for _ in queries]
+
+        by_position = {chunk.position: chunk for chunk in chunks}
+        centroid = Counter()
+        for chunk in chunks:
+            centroid.update(chunk.terms)
+        centroid = self._normalize(centroid)
+
+        used = Counter()
+        contexts = []
+        for query in queries:
+            positions = self._select(chunks, centroid, budget, query, used)
+            used.update(positions)
+            contexts.append('\n\n'.join(by_position[position].content for position in positions)[:budget])
+        return contexts
+
+    def context(self, portfolio, query=None, budget=None):
+        """Portfolio text for a single prompt"""
+        return self.contexts(portfolio, [query], budget)[0]
+
+
+portfolio_index = PortfolioIndex()
@@ -1,22 +1,105 @@
+import hashlib
+import io
+import logging
+import os
 import PyPDF2
 from docx import Document
+from flask import current_app
+from app import db
+from app.services.task_queue import task_queue
+
+logger = logging.getLogger(__name__)
 
 class PortfolioService:
     """Handle portfolio document processing"""
     
+    PDF_PAGES_PER_TASK = 20  # Pages per process-pool task when extracting in parallel
+    
+    @staticmethod
+    def file_content_hash(file_path, chunk_size=1024 * 1024):
+        """SHA-256 of a file, read in chunks"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    @staticmethod
+    def get_pdf_page_count(file_path):
+        """Number of pages in a PDF"""
+        with open(file_path, 'rb') as file:
+            return len(PyPDF2.PdfReader(file).pages)
+    
     @staticmethod
-    def extract_text_from_pdf(file_path):
-        """Extract text from PDF"""
+    def iter_pdf_pages(file_path, start=0, stop=None, cache_dir=None):
+        """
+        Yield the text of PDF pages [start, stop) one page at a time.
+        
+        When cache_dir is given (one directory per document content hash),
+        each page's text is read from / written to <cache_dir>/<page>.txt so
+        re-uploads of the same document are not parsed again.
+        """
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        
+        with open(file_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            stop = len(pdf_reader.pages) if stop is None else min(stop, len(pdf_reader.pages))
+            
+            for page_number in range(start, stop):
+                cache_path = os.path.join(cache_dir, f'{page_number}.txt') if cache_dir else None
+                if cache_path and os.path.exists(cache_path):
+                    with open(cache_path, 'r', encoding='utf-8') as cached:
+                        yield cached.read()
+                    continue
+                
+                text = pdf_reader.pages[page_number].extract_text() or ''
+                if cache_path:
+                    tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+                    with open(tmp_path, 'w', encoding='utf-8') as cached:
+                        cached.write(text)
+                    os.replace(tmp_path, cache_path)
+                yield text
+    
+    @staticmethod
+    def extract_text_from_pdf(file_path, max_chars=None, start=0, stop=None, cache_dir=None):
+        """Extract text from PDF, stopping early once max_chars have been collected"""
         try:
-            text = []
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text.append(page.extract_text())
-            return ' '.join(text)
+            text = io.StringIO()
+            collected = 0
+            for page_text in PortfolioService.iter_pdf_pages(file_path, start, stop, cache_dir):
+                if collected:
+                    text.write(' ')
+                text.write(page_text)
+                collected += len(page_text) + 1
+                if max_chars and collected >= max_chars:
+                    break
+            
+            result = text.getvalue()
+            return result[:max_chars] if max_chars else result
         except Exception as e:
             raise Exception(f'Error extracting PDF text: {str(e)}')
     
+    @staticmethod
+    def extract_pdf_parallel(file_path, cache_dir=None, timeout=None):
+        """
+        Extract a whole PDF by splitting its pages into ranges across the process pool.
+        
+        Ranges are joined back in page order.
+        """
+        page_count = task_queue.run_in_process(
+            PortfolioService.get_pdf_page_count, file_path
+        ).result(timeout=timeout)
+        
+        step = PortfolioService.PDF_PAGES_PER_TASK
+        futures = [
+            task_queue.run_in_process(
+                PortfolioService.extract_text_from_pdf, file_path, None, start, start + step, cache_dir
+            )
+            for start in range(0, page_count, step)
+        ]
+        return ' '.join(future.result(timeout=timeout) for future in futures)
+    
     @staticmethod
     def extract_text_from_docx(file_path):
         """Extract text from DOCX"""
@@ -39,5 +122,133 @@ class PortfolioService:
                 return f.read()
         else:
             return None
+    
+    @staticmethod
+    def pdf_cache_dir(file_path, content_hash=None):
+        """Per-document page text cache directory, keyed by file content hash"""
+        content_hash = content_hash or PortfolioService.file_content_hash(file_path)
+        return os.path.join(current_app.config['UPLOAD_FOLDER'], '.cache', 'pdf_text', content_hash)
+    
+    @staticmethod
+    def get_file_type(filename):
+        """Portfolio.file_type for an uploaded filename"""
+        ext = os.path.splitext(filename)[1].lower()
+        if ext == '.pdf':
+            return 'pdf'
+        elif ext in ['.docx', '.doc']:
+            return 'docx' if ext == '.docx' else 'doc'
+        elif ext == '.txt':
+            return 'txt'
+        return 'image'
+    
+    @staticmethod
+    def create_portfolio(user_id, file_path, filename, content_hash, is_duplicate, title=None, description=''):
+        """
+        Create the Portfolio row for a file already in the blob store and queue text extraction.
+        
+        Text (and its passage index) already extracted from the same document is reused.
+        """
+        from app.models import Portfolio
+        from app.services.portfolio_index import portfolio_index
+        from app.services.stats_service import stats_service
+        
+        portfolio = Portfolio(
+            user_id=user_id,
+            filename=filename,
+            file_path=file_path,
+            content_hash=content_hash,
+            file_type=PortfolioService.get_file_type(filename),
+            file_size=os.path.getsize(file_path),
+            title=title or filename,
+            description=description or '',
+            status='uploaded'
+        )
+        
+        extracted = Portfolio.query.filter(
+            Portfolio.content_hash == content_hash,
+            Portfolio.status == 'completed',
+            Portfolio.extracted_text.isnot(None)
+        ).first() if is_duplicate else None
+        if extracted:
+            portfolio.extracted_text = extracted.extracted_text
+            portfolio.status = 'completed'
+        
+        db.session.add(portfolio)
+        if extracted:
+            db.session.flush()
+            portfolio_index.index_portfolio(
+                portfolio, [(chunk.content, chunk.terms) for chunk in extracted.chunks]
+            )
+        db.session.commit()
+        stats_service.invalidate(user_id)
+        
+        # Extract text in the background; clients poll /portfolios/<id>/status
+        if not extracted:
+            PortfolioService.enqueue_extraction(portfolio.id)
+        
+        return portfolio
+    
+    @staticmethod
+    def enqueue_extraction(portfolio_id):
+        """Queue text extraction for an uploaded portfolio"""
+        return task_queue.submit(PortfolioService.process_portfolio, portfolio_id)
+    
+    @staticmethod
+    def process_portfolio(portfolio_id):
+        """
+        Background job: extract a portfolio's text in the process pool, then index its passages.
+        
+        Drives Portfolio.status: uploaded -> processing -> completed/failed
+        """
+        from app.models import Portfolio
+        from app.services.portfolio_index import PortfolioIndex, portfolio_index
+        
+        portfolio = db.session.get(Portfolio, portfolio_id)
+        if not portfolio or portfolio.status not in ('uploaded', 'processing'):
+            return None
+        
+        portfolio.status = 'processing'
+        db.session.commit()
+        
+        try:
+            timeout = current_app.config['PORTFOLIO_EXTRACTION_TIMEOUT']
+            max_chars = current_app.config['PORTFOLIO_MAX_EXTRACTED_CHARS']
+            
+            if portfolio.file_type == 'pdf':
+                cache_dir = PortfolioService.pdf_cache_dir(portfolio.file_path, portfolio.content_hash)
+                if max_chars:
+                    # Stream pages in order and stop as soon as enough text is collected
+                    text = task_queue.run_in_process(
+                        PortfolioService.extract_text_from_pdf, portfolio.file_path, max_chars, 0, None, cache_dir
+                    ).result(timeout=timeout)
+                else:
+                    text = PortfolioService.extract_pdf_parallel(portfolio.file_path, cache_dir, timeout)
+            else:
+                text = task_queue.run_in_process(
+                    PortfolioService.extract_text_from_file, portfolio.file_path, portfolio.file_type
+                ).result(timeout=timeout)
+            
+            portfolio.extracted_text = text
+            portfolio.status = 'completed'
+        except Exception as e:
+            portfolio.status = 'failed'
+            logger.error(f'Error extracting text from portfolio {portfolio_id}: {e}')
+        
+        db.session.commit()
+        
+        if portfolio.status == 'completed':
+            try:
+                built = task_queue.run_in_process(
+                    PortfolioIndex.build, portfolio.extracted_text,
+                    current_app.config['PORTFOLIO_CHUNK_CHARS'], current_app.config['PORTFOLIO_CHUNK_TERMS']
+                ).result(timeout=timeout)
+                portfolio_index.index_portfolio(portfolio, built)
+                db.session.commit()
+            except Exception as e:
+                # Not fatal: the index is rebuilt the first time posts are generated
+                db.session.rollback()
+                logger.warning(f'Error indexing portfolio {portfolio_id}: {e}')
+        
+        return portfolio.status
 
 portfolio_service = PortfolioService()
@@ -1,4 +1,6 @@
 from app.services.facebook_service import facebook_service
+from app.services.stats_service import stats_service
+from app.services.quota_service import quota_service
 from app.models import Post, PostAnalytics
 from app import db
 from datetime import datetime
@@ -24,7 +26,9 @@ class PostService:
                 post.media_items.append(m)
         
         db.session.add(post)
+        quota_service.consume(user, 'posts_per_month')
         db.session.commit()
+        stats_service.invalidate(user.id)
         
         return post
     
@@ -32,6 +36,7 @@ class PostService:
     def approve_post(post, user):
         """Approve a post for publishing"""
         post.mark_as_approved(user)
+        stats_service.invalidate(post.user_id)
         return post
     
     @staticmethod
@@ -69,6 +74,7 @@ class PostService:
             )
             db.session.add(analytics)
             db.session.commit()
+            stats_service.invalidate(post.user_id)
             
             return post
         except Exception as e:
@@ -80,6 +86,7 @@ class PostService:
         post.status = 'rejected'
         post.rejection_reason = reason
         db.session.commit()
+        stats_service.invalidate(post.user_id)
         return post
     
     @staticmethod
@@ -0,0 +1,71 @@
+"""
+Principal Cache
+Loads the logged-in User for each request without its heavy token/JSON columns
+"""
+import threading
+import time
+from flask import current_app
+from sqlalchemy.orm import Session, defer
+from app import db
+from app.models import User
+
+
+class PrincipalCache:
+    """
+    Backs Flask-Login's user_loader.
+
+    The User row is loaded with PRINCIPAL_DEFERRED columns deferred (they load
+    on first access), and for USER_PRINCIPAL_CACHE_TTL seconds a detached copy
+    is reused per user, attached to each request's session with
+    session.merge(load=False) instead of a SELECT. Updating or deleting a User
+    invalidates its entry in this process; other processes see the change when
+    the TTL expires.
+    """
+
+    MAX_CACHED_USERS = 10000
+
+    def __init__(self):
+        self._cache = {}  # user_id -> (expires_at, detached User)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _options():
+        return [defer(getattr(User, name)) for name in User.PRINCIPAL_DEFERRED]
+
+    def get(self, user_id):
+        """The User for user_id attached to the current session, or None"""
+        ttl = current_app.config['USER_PRINCIPAL_CACHE_TTL']
+        if not ttl:
+            return db.session.get(User, user_id, options=self._options())
+
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(user_id)
+        if not cached or cached[0] <= now:
+            # Own short-lived session, so the copy handed to requests is never one they modify
+            with Session(db.engine) as session:
+                user = session.get(User, user_id, options=self._options())
+                session.expunge_all()
+            if user is None:
+                return None
+            cached = (now + ttl, user)
+            with self._lock:
+                if len(self._cache) >= self.MAX_CACHED_USERS:
+                    self._prune(now)
+                self._cache[user_id] = cached
+
+        return db.session.merge(cached[1], load=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    def _prune(self, now):
+        expired = [user_id for user_id, (expires_at, _) in self._cache.items() if expires_at <= now]
+        for user_id in expired:
+            del self._cache[user_id]
+        if len(self._cache) >= self.MAX_CACHED_USERS:
+            self._cache.clear()
+
+
+principal_cache = PrincipalCache()
@@ -0,0 +1,232 @@
+"""
+Multi-Page Publishing
+Publishes one Post to many Facebook pages concurrently, with a result row per page
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import undefer
+from app import db
+from app.models import FacebookPage, PostAnalytics, PostPublication
+from app.services.facebook_service import facebook_service
+from app.services.stats_service import stats_service
+
+logger = logging.getLogger(__name__)
+
+
+class PublicationService:
+    """
+    Fan a post out to several of the user's pages.
+
+    Each page gets a PostPublication row that is claimed ('publishing') and
+    committed before any API call. The Graph API calls run on a bounded
+    thread pool (PUBLISH_FANOUT_MAX_WORKERS), so a batch takes about as long
+    as its slowest call, and the outcomes are written back in bulk. Rows are
+    claimed with a conditional UPDATE, and pages that already have the post
+    (including the selected page, if the post went out through /publish) are
+    never sent again, which is what makes retry_failed() safe.
+    """
+
+    def publish(self, post, user, page_ids):
+        """
+        Publish post to the given Facebook page IDs.
+
+        Returns:
+            dict: {'published': int, 'failed': int, 'results': [per-page dicts]}
+        """
+        page_ids = list(dict.fromkeys(page_id for page_id in page_ids if page_id))
+        if not page_ids:
+            raise Exception('Select at least one page')
+
+        limit = user.entitlements.limit('pages')
+        if limit is not None and len(page_ids) > limit:
+            raise Exception(
+                f'Your plan allows publishing to {limit} page{"s" if limit != 1 else ""}. Upgrade to publish to more.'
+            )
+
+        pages = FacebookPage.query.filter(
+            FacebookPage.user_id == user.id,
+            FacebookPage.page_id.in_(page_ids)
+        ).options(undefer(FacebookPage.access_token)).all()
+        missing = set(page_ids) - {page.page_id for page in pages}
+        if missing:
+            raise Exception(f'Page not found: {", ".join(sorted(missing))}')
+
+        jobs = self._claim(post, user, pages)
+        if not jobs:
+            return {'published': 0, 'failed': 0, 'results': []}
+
+        max_workers = min(current_app.config['PUBLISH_FANOUT_MAX_WORKERS'], len(jobs)) or 1
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(self._publish_one, jobs))
+
+        return self._write_results(post, user, jobs, results)
+
+    def retry_failed(self, post, user):
+        """Re-publish only the pages whose last attempt failed"""
+        page_ids = [row.page_id for row in post.publications.filter_by(status='failed').with_entities(
+            PostPublication.page_id
+        )]
+        if not page_ids:
+            raise Exception('No failed pages to retry')
+        return self.publish(post, user, page_ids)
+
+    @staticmethod
+    def _seed_selected_page(post, user):
+        """Record a post already published to the selected page through /publish, so it is never sent there again"""
+        if not (post.facebook_post_id and user.selected_page_id):
+            return
+        if post.publications.filter(db.or_(
+            PostPublication.page_id == user.selected_page_id,
+            PostPublication.facebook_post_id == post.facebook_post_id  # Primary ID set by a fan-out
+        )).count():
+            return
+        try:
+            with db.session.begin_nested():
+                db.session.add(PostPublication(
+                    post_id=post.id,
+                    user_id=user.id,
+                    page_id=user.selected_page_id,
+                    page_name=user.selected_page_name,
+                    status='published',
+                    facebook_post_id=post.facebook_post_id,
+                    facebook_url=post.facebook_url,
+                    published_at=post.posted_at,
+                    attempts=1
+                ))
+        except IntegrityError:
+            pass  # Another request recorded the page first
+
+    @classmethod
+    def _claim(cls, post, user, pages):
+        """
+        Claim a row per page and commit; returns the API jobs.
+
+        Rows are claimed with a conditional UPDATE (pending/failed, or a
+        stale 'publishing'), so of two concurrent requests for the same page
+        only the one whose UPDATE matched publishes it.
+        """
+        cls._seed_selected_page(post, user)
+
+        existing = {
+            row.page_id for row in post.publications.filter(
+                PostPublication.page_id.in_([page.page_id for page in pages])
+            ).with_entities(PostPublication.page_id)
+        }
+        for page in pages:
+            if page.page_id in existing:
+                continue
+            try:
+                with db.session.begin_nested():
+                    db.session.add(PostPublication(
+                        post_id=post.id, user_id=user.id, page_id=page.page_id,
+                        page_name=page.name, status='pending', attempts=0
+                    ))
+            except IntegrityError:
+                pass  # Another request created the row; the claim below decides who publishes
+
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=current_app.config['PUBLISHER_CLAIM_TIMEOUT'])
+        claimed = []
+        for page in pages:
+            updated = PostPublication.query.filter(
+                PostPublication.post_id == post.id,
+                PostPublication.page_id == page.page_id,
+                db.or_(
+                    PostPublication.status.in_(['pending', 'failed']),
+                    db.and_(PostPublication.status == 'publishing', PostPublication.updated_at < stale)
+                )
+            ).update({'status': 'publishing', 'page_name': page.name, 'updated_at': now}, synchronize_session=False)
+            if updated == 1:
+                claimed.append(page)
+
+        rows = {
+            row.page_id: row for row in post.publications.filter(
+                PostPublication.page_id.in_([page.page_id for page in claimed])
+            ).with_entities(PostPublication.id, PostPublication.page_id, PostPublication.attempts)
+        } if claimed else {}
+        jobs = [{
+            'publication_id': rows[page.page_id].id,
+            'attempts': rows[page.page_id].attempts or 0,
+            'page_id': page.page_id,
+            'page_name': page.name,
+            'page_token': page.access_token,
+            'content': post.content,
+            'image_url': post.preview_url or None,
+        } for page in claimed]
+        db.session.commit()
+        return jobs
+
+    @staticmethod
+    def _publish_one(job):
+        """Publish to a single page; returns (facebook_post_id, error_message)"""
+        if not job['page_token']:
+            return None, 'No page access token available. Please re-authenticate.'
+        try:
+            result = facebook_service.publish_post(
+                job['page_id'],
+                job['content'],
+                job['page_token'],
+                image_url=job['image_url']
+            )
+            return result.get('id'), None
+        except Exception as e:
+            return None, str(e)
+
+    @staticmethod
+    def _write_results(post, user, jobs, results):
+        """Persist per-page outcomes in one transaction and mark the post posted on first success"""
+        now = datetime.utcnow()
+        updates = []
+        summary = {'published': 0, 'failed': 0, 'results': []}
+
+        for job, (facebook_post_id, error) in zip(jobs, results):
+            status = 'published' if facebook_post_id else 'failed'
+            summary[status] += 1
+            facebook_url = f"https://facebook.com/{facebook_post_id}" if facebook_post_id else None
+            updates.append({
+                'id': job['publication_id'],
+                'status': status,
+                'attempts': job['attempts'] + 1,
+                'facebook_post_id': facebook_post_id,
+                'facebook_url': facebook_url,
+                'published_at': now if facebook_post_id else None,
+                'error_message': error,
+                'updated_at': now
+            })
+            summary['results'].append({
+                'page_id': job['page_id'],
+                'page_name': job['page_name'],
+                'status': status,
+                'facebook_post_id': facebook_post_id,
+                'facebook_url': facebook_url,
+                'error': error
+            })
+
+        db.session.bulk_update_mappings(PostPublication, updates)
+
+        published = [result for result in summary['results'] if result['status'] == 'published']
+        if published and post.status != 'posted':
+            # The selected page (if published to) stays the post's primary Facebook ID for analytics
+            primary = next((r for r in published if r['page_id'] == user.selected_page_id), published[0])
+            post.status = 'posted'
+            post.facebook_post_id = primary['facebook_post_id']
+            post.facebook_url = primary['facebook_url']
+            post.posted_at = now
+            db.session.add(PostAnalytics(user_id=user.id, post_id=post.id))
+
+        db.session.commit()
+        stats_service.invalidate(user.id)
+
+        if summary['failed']:
+            logger.warning(f"Post {post.id}: {summary['failed']} of {len(jobs)} page publishes failed")
+        return summary
+
+    @staticmethod
+    def list_publications(post):
+        return post.publications.order_by(PostPublication.page_name).all()
+
+
+publication_service = PublicationService()
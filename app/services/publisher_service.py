@@ -0,0 +1,209 @@
+"""
+Scheduled Post Publisher
+Claims due ScheduledPost rows in batches and publishes them to Facebook concurrently
+"""
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from app.models import Post, ScheduledPost, PostAnalytics, User
+from app.services.facebook_service import facebook_service
+from app.services.quota_service import quota_service
+
+logger = logging.getLogger(__name__)
+
+
+class PublisherService:
+    """Publish due scheduled posts (run from worker.py)"""
+
+    def release_stale_claims(self):
+        """Return rows stuck in 'publishing' (e.g. worker crashed) to the queue"""
+        cutoff = datetime.utcnow() - timedelta(seconds=current_app.config['PUBLISHER_CLAIM_TIMEOUT'])
+        released = ScheduledPost.query.filter(
+            ScheduledPost.publish_status == 'publishing',
+            ScheduledPost.updated_at < cutoff
+        ).update({'publish_status': 'scheduled'}, synchronize_session=False)
+        db.session.commit()
+        if released:
+            logger.warning(f"Released {released} stale scheduled post claim(s)")
+        return released
+
+    def claim_due(self, batch_size=None, now=None):
+        """
+        Claim a batch of due scheduled posts for this worker.
+
+        Uses the scheduled_at index and FOR UPDATE SKIP LOCKED (PostgreSQL) so that
+        several workers can poll in parallel without picking up the same rows.
+        Each row is then claimed with a conditional UPDATE, so where SKIP LOCKED
+        is a no-op (SQLite) a row two workers both selected goes to only one of
+        them. Claimed rows are moved to 'publishing' and committed before any
+        API call.
+
+        Returns:
+            list: ScheduledPost ids claimed by this worker
+        """
+        batch_size = batch_size or current_app.config['PUBLISHER_BATCH_SIZE']
+        now = now or datetime.utcnow()
+        retry_cutoff = now - timedelta(seconds=current_app.config['PUBLISHER_RETRY_DELAY'])
+
+        rows = db.session.query(ScheduledPost.id).filter(
+            ScheduledPost.publish_status == 'scheduled',
+            ScheduledPost.scheduled_at <= now,
+            db.or_(ScheduledPost.last_retry_at.is_(None), ScheduledPost.last_retry_at <= retry_cutoff)
+        ).order_by(ScheduledPost.scheduled_at).limit(batch_size).with_for_update(skip_locked=True).all()
+
+        claimed = []
+        for row in rows:
+            updated = ScheduledPost.query.filter(
+                ScheduledPost.id == row.id,
+                ScheduledPost.publish_status == 'scheduled'
+            ).update({'publish_status': 'publishing', 'updated_at': now}, synchronize_session=False)
+            if updated == 1:
+                claimed.append(row.id)
+        db.session.commit()
+        return claimed
+
+    def publish_claimed(self, scheduled_ids):
+        """
+        Publish claimed rows concurrently and write the outcome back in bulk.
+
+        Returns:
+            dict: {'published': int, 'retrying': int, 'failed': int}
+        """
+        if not scheduled_ids:
+            return {'published': 0, 'retrying': 0, 'failed': 0}
+
+        rows = db.session.query(
+            ScheduledPost.id, ScheduledPost.retry_count,
+            Post.id, Post.user_id, Post.content, Post.preview_url, Post.status,
+            User.selected_page_id, User.page_access_token
+        ).join(Post, Post.id == ScheduledPost.post_id).join(
+            User, User.id == ScheduledPost.user_id
+        ).filter(ScheduledPost.id.in_(scheduled_ids)).all()
+
+        jobs = [{
+            'scheduled_id': row[0],
+            'retry_count': row[1] or 0,
+            'post_id': row[2],
+            'user_id': row[3],
+            'content': row[4],
+            'image_url': row[5] or None,
+            'post_status': row[6],
+            'page_id': row[7],
+            'page_token': row[8],
+        } for row in rows]
+
+        # Graph API calls only need plain data, so they can run outside the session
+        max_workers = min(current_app.config['PUBLISHER_MAX_WORKERS'], len(jobs)) or 1
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(self._publish_one, jobs))
+
+        return self._write_results(jobs, results)
+
+    def run_once(self):
+        """
+        Release stale claims, then claim and publish one batch.
+
+        Returns:
+            dict: publish_claimed() counts plus 'claimed' (rows taken from the queue)
+        """
+        self.release_stale_claims()
+        scheduled_ids = self.claim_due()
+        summary = self.publish_claimed(scheduled_ids)
+        if scheduled_ids:
+            logger.info(f"Publisher batch: {len(scheduled_ids)} claimed, {summary}")
+        return dict(summary, claimed=len(scheduled_ids))
+
+    @staticmethod
+    def _publish_one(job):
+        """Publish a single job; returns (facebook_post_id, error_message)"""
+        if job['post_status'] == 'posted':
+            return None, 'Post was already published'
+        if not job['page_id']:
+            return None, 'No Facebook page selected. Please select a page.'
+        if not job['page_token']:
+            return None, 'No page access token available. Please re-authenticate.'
+
+        try:
+            result = facebook_service.publish_post(
+                job['page_id'],
+                job['content'],
+                job['page_token'],
+                image_url=job['image_url']
+            )
+            return result.get('id'), None
+        except Exception as e:
+            return None, str(e)
+
+    def _write_results(self, jobs, results):
+        """Persist publish outcomes with bulk statements in a single transaction"""
+        now = datetime.utcnow()
+        max_retries = current_app.config['PUBLISHER_MAX_RETRIES']
+        summary = {'published': 0, 'retrying': 0, 'failed': 0}
+
+        scheduled_updates = []
+        post_updates = []
+        analytics_rows = []
+        dequeued = Counter()  # user_id -> rows leaving the queue (freeing scheduled_posts quota)
+
+        for job, (facebook_post_id, error) in zip(jobs, results):
+            if facebook_post_id:
+                summary['published'] += 1
+                scheduled_updates.append({
+                    'id': job['scheduled_id'],
+                    'publish_status': 'published',
+                    'published_at': now,
+                    'error_message': None
+                })
+                post_updates.append({
+                    'id': job['post_id'],
+                    'status': 'posted',
+                    'facebook_post_id': facebook_post_id,
+                    'facebook_url': f"https://facebook.com/{facebook_post_id}",
+                    'posted_at': now
+                })
+                analytics_rows.append({
+                    'user_id': job['user_id'],
+                    'post_id': job['post_id'],
+                    'created_at': now,
+                    'updated_at': now
+                })
+                dequeued[job['user_id']] += 1
+                continue
+
+            retry_count = job['retry_count'] + 1
+            if job['post_status'] == 'posted':
+                status = 'cancelled'
+            elif retry_count < max_retries:
+                status = 'scheduled'
+                summary['retrying'] += 1
+            else:
+                status = 'failed'
+                summary['failed'] += 1
+            if status != 'scheduled':
+                dequeued[job['user_id']] += 1
+
+            scheduled_updates.append({
+                'id': job['scheduled_id'],
+                'publish_status': status,
+                'retry_count': retry_count,
+                'last_retry_at': now,
+                'error_message': error
+            })
+
+        if scheduled_updates:
+            db.session.bulk_update_mappings(ScheduledPost, scheduled_updates)
+        if post_updates:
+            db.session.bulk_update_mappings(Post, post_updates)
+        if analytics_rows:
+            db.session.bulk_insert_mappings(PostAnalytics, analytics_rows)
+        for user_id, count in dequeued.items():
+            quota_service.release(user_id, 'scheduled_posts', count)
+        db.session.commit()
+
+        return summary
+
+
+publisher_service = PublisherService()
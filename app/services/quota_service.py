@@ -0,0 +1,154 @@
+"""
+Quota Service
+Enforces plan limits (Plan.features) with per-user usage counters
+"""
+import logging
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import UsageCounter
+
+logger = logging.getLogger(__name__)
+
+
+class QuotaExceeded(Exception):
+    """An action would take the user past a plan limit"""
+
+    def __init__(self, metric, limit):
+        self.metric = metric
+        self.limit = limit
+        super().__init__(QuotaService.MESSAGES[metric].format(limit=QuotaService.display_limit(metric, limit)))
+
+
+class QuotaService:
+    """
+    One usage_counters row per (user, metric, period) instead of COUNT(*)/SUM()
+    on every create.
+
+    consume() is a single conditional UPDATE (used = used + n WHERE used + n <=
+    limit), so concurrent requests cannot both take the last unit, and it runs
+    in the caller's transaction: rolling back the create rolls back the usage.
+    Monthly metrics start a new row each calendar month; running totals
+    (scheduled posts, storage) use period 'total' and are given back with
+    release().
+    """
+
+    MONTHLY = 'monthly'
+    TOTAL = 'total'
+
+    METRICS = {
+        'posts_per_month': MONTHLY,
+        'ai_captions_per_month': MONTHLY,
+        'scheduled_posts': TOTAL,
+        'media_storage_gb': TOTAL,  # counted in bytes
+    }
+
+    MESSAGES = {
+        'posts_per_month': 'You have reached your plan limit of {limit} posts this month. Upgrade to create more.',
+        'ai_captions_per_month': 'You have reached your plan limit of {limit} AI captions this month. Upgrade to generate more.',
+        'scheduled_posts': 'You have reached your plan limit of {limit} scheduled posts. Upgrade to schedule more.',
+        'media_storage_gb': 'This upload would exceed your {limit} media storage. Delete some media or upgrade your plan.',
+    }
+
+    GB = 1024 ** 3
+
+    @classmethod
+    def period(cls, metric, now=None):
+        if cls.METRICS[metric] == cls.MONTHLY:
+            return (now or datetime.utcnow()).strftime('%Y-%m')
+        return 'total'
+
+    @classmethod
+    def limit_for(cls, user, metric):
+        """The user's limit in counter units, or None when the plan leaves it unlimited"""
+        limit = user.entitlements.limit(metric)
+        if limit is None:
+            return None
+        if metric == 'media_storage_gb':
+            return int(limit * cls.GB)
+        return int(limit)
+
+    @staticmethod
+    def display_limit(metric, limit):
+        if metric == 'media_storage_gb':
+            return f'{limit / QuotaService.GB:g} GB'
+        return limit
+
+    def _counter(self, user_id, metric, period):
+        return UsageCounter.query.filter_by(user_id=user_id, metric=metric, period=period)
+
+    def consume(self, user, metric, amount=1):
+        """
+        Add amount to the user's usage, raising QuotaExceeded if that would pass the limit.
+
+        Runs in the caller's transaction; commit it together with the row being created.
+        """
+        if amount <= 0:
+            return
+        limit = self.limit_for(user, metric)
+        period = self.period(metric)
+
+        for attempt in range(2):
+            query = self._counter(user.id, metric, period)
+            if limit is not None:
+                query = query.filter(UsageCounter.used + amount <= limit)
+            if query.update({UsageCounter.used: UsageCounter.used + amount}, synchronize_session=False):
+                return
+            if attempt or not self._create_counter(user.id, metric, period):
+                break
+
+        raise QuotaExceeded(metric, limit)
+
+    def _create_counter(self, user_id, metric, period):
+        """Insert an empty counter; False if one already existed (so the UPDATE failed on the limit)"""
+        if self._counter(user_id, metric, period).with_entities(UsageCounter.id).first():
+            return False
+        try:
+            with db.session.begin_nested():
+                db.session.add(UsageCounter(user_id=user_id, metric=metric, period=period, used=0))
+        except IntegrityError:
+            # A concurrent request created it first
+            pass
+        return True
+
+    def check(self, user, metric, amount=1):
+        """
+        Raise QuotaExceeded if amount more would pass the limit, without consuming.
+
+        A cheap early exit before expensive work (e.g. an AI call); the
+        authoritative check is still consume().
+        """
+        limit = self.limit_for(user, metric)
+        if limit is not None and self.get_usage(user.id, metric) + amount > limit:
+            raise QuotaExceeded(metric, limit)
+
+    def release(self, user_id, metric, amount=1):
+        """Give back running-total usage (a scheduled post left the queue, media was deleted)"""
+        if amount <= 0:
+            return
+        self._counter(user_id, metric, self.period(metric)).update({
+            UsageCounter.used: db.case((UsageCounter.used > amount, UsageCounter.used - amount), else_=0)
+        }, synchronize_session=False)
+
+    def get_usage(self, user_id, metric):
+        """Current period usage in counter units"""
+        used = self._counter(user_id, metric, self.period(metric)).with_entities(UsageCounter.used).scalar()
+        return used or 0
+
+    def usage_summary(self, user):
+        """{metric: {'used', 'limit'}} for the current period, in counter units"""
+        rows = UsageCounter.query.filter(
+            UsageCounter.user_id == user.id,
+            UsageCounter.period.in_({self.period(metric) for metric in self.METRICS})
+        ).all()
+        used = {(row.metric, row.period): row.used for row in rows}
+        return {
+            metric: {
+                'used': used.get((metric, self.period(metric)), 0),
+                'limit': self.limit_for(user, metric)
+            }
+            for metric in self.METRICS
+        }
+
+
+quota_service = QuotaService()
@@ -0,0 +1,73 @@
+import threading
+import time
+from flask import current_app
+from app import db
+from app.models import Post, ScheduledPost, Media, Portfolio
+
+
+class StatsService:
+    """Dashboard status counts with a short-lived per-user cache"""
+
+    MAX_CACHED_USERS = 10000
+
+    def __init__(self):
+        self._cache = {}  # user_id -> (expires_at, stats)
+        self._lock = threading.Lock()
+
+    def get_stats(self, user_id):
+        """Get post/schedule/media/portfolio counts for a user (served from cache when fresh)"""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(user_id)
+        if cached and cached[0] > now:
+            return dict(cached[1])
+
+        stats = self._compute(user_id)
+
+        with self._lock:
+            if len(self._cache) >= self.MAX_CACHED_USERS:
+                self._prune(now)
+            self._cache[user_id] = (now + current_app.config['DASHBOARD_STATS_CACHE_TTL'], stats)
+        return dict(stats)
+
+    def invalidate(self, user_id):
+        """Drop a user's cached stats after one of their counts changed"""
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    def _prune(self, now):
+        expired = [user_id for user_id, (expires_at, _) in self._cache.items() if expires_at <= now]
+        for user_id in expired:
+            del self._cache[user_id]
+        if len(self._cache) >= self.MAX_CACHED_USERS:
+            self._cache.clear()
+
+    @staticmethod
+    def _compute(user_id):
+        """One grouped count per table instead of a COUNT per status"""
+        post_counts = dict(db.session.query(Post.status, db.func.count(Post.id)).filter(
+            Post.user_id == user_id
+        ).group_by(Post.status).all())
+
+        schedule_counts = dict(db.session.query(
+            ScheduledPost.publish_status, db.func.count(ScheduledPost.id)
+        ).filter(ScheduledPost.user_id == user_id).group_by(ScheduledPost.publish_status).all())
+
+        media_count = db.session.query(db.func.count(Media.id)).filter(
+            Media.user_id == user_id).scalar_subquery()
+        portfolio_count = db.session.query(db.func.count(Portfolio.id)).filter(
+            Portfolio.user_id == user_id).scalar_subquery()
+        media_total, portfolio_total = db.session.query(media_count, portfolio_count).one()
+
+        return {
+            'total_posts': sum(post_counts.values()),
+            'pending_posts': post_counts.get('pending', 0),
+            'approved_posts': post_counts.get('approved', 0),
+            'posted_posts': post_counts.get('posted', 0),
+            'rejected_posts': post_counts.get('rejected', 0),
+            'scheduled_posts': schedule_counts.get('scheduled', 0),
+            'media_count': media_total,
+            'portfolio_count': portfolio_total
+        }
+
+stats_service = StatsService()
@@ -0,0 +1,100 @@
+"""
+Background Task Queue
+Runs slow work (document parsing, image processing) outside the request/response cycle
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+from app import db
+
+logger = logging.getLogger(__name__)
+
+
+class TaskQueue:
+    """
+    In-process job queue with two executors:
+
+    - a small thread pool that runs job functions inside an app context
+      (loading rows, updating status, committing)
+    - a process pool for CPU-bound steps, so parsing does not hold the GIL
+      of the web worker that accepted the upload
+    """
+
+    def __init__(self):
+        self.app = None
+        self._threads = None
+        self._processes = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+
+    @property
+    def threads(self):
+        if self._threads is None:
+            with self._lock:
+                if self._threads is None:
+                    self._threads = ThreadPoolExecutor(
+                        max_workers=self.app.config['TASK_QUEUE_THREADS'],
+                        thread_name_prefix='task-queue'
+                    )
+        return self._threads
+
+    @property
+    def processes(self):
+        if self._processes is None:
+            with self._lock:
+                if self._processes is None:
+                    # spawn: forking a multi-threaded web worker can deadlock the child
+                    self._processes = ProcessPoolExecutor(
+                        max_workers=self.app.config['TASK_QUEUE_PROCESSES'],
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+        return self._processes
+
+    @property
+    def eager(self):
+        """Run tasks inline (TASK_QUEUE_EAGER) - used by the testing config"""
+        return self.app.config.get('TASK_QUEUE_EAGER', False)
+
+    def submit(self, func, *args, **kwargs):
+        """Run func(*args, **kwargs) in a background thread with an app context"""
+        if self.eager:
+            return self._completed(func, *args, **kwargs)
+        return self.threads.submit(self._run, func, args, kwargs)
+
+    def run_in_process(self, func, *args, **kwargs):
+        """Run a picklable, database-free function in the process pool; returns a Future"""
+        if self.eager:
+            return self._completed(func, *args, **kwargs)
+        return self.processes.submit(func, *args, **kwargs)
+
+    @staticmethod
+    def _completed(func, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(func(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _run(self, func, args, kwargs):
+        with self.app.app_context():
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                logger.exception(f"Background task {func.__qualname__} failed")
+                db.session.rollback()
+                raise
+            finally:
+                db.session.remove()
+
+    def shutdown(self, wait=True):
+        if self._threads:
+            self._threads.shutdown(wait=wait)
+        if self._processes:
+            self._processes.shutdown(wait=wait)
+
+
+task_queue = TaskQueue()
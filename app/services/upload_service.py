@@ -0,0 +1,261 @@
+"""
+Chunked Upload Service
+Resumable uploads for large media and portfolio files, written and hashed chunk by chunk
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from app.models import UploadSession, User
+from app.services.blob_store import blob_store
+from app.services.media_service import media_service
+from app.services.portfolio_service import portfolio_service
+from app.services.quota_service import quota_service
+
+logger = logging.getLogger(__name__)
+
+
+class UploadService:
+    """
+    Resumable uploads: create a session, PUT chunks at the current offset, complete.
+
+    Chunks are written to blobs/tmp/<session>.part and hashed as they arrive,
+    so completing an upload is a rename into the blob store rather than a
+    copy. The running SHA-256 is cached in memory per session and only used
+    while its offset matches the session's received_size; when a chunk
+    lands on another worker (or after a restart) the received prefix is
+    re-hashed from disk once. Idle cache entries expire with the session.
+    """
+
+    TARGETS = ('media', 'portfolio')
+    READ_SIZE = 1024 * 1024
+
+    def __init__(self):
+        self._hashers = {}  # session id -> (offset, sha256 of bytes [0, offset), last used)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def part_path(session_id):
+        return os.path.join(blob_store.root, 'tmp', f'{session_id}.part')
+
+    def create_session(self, user_id, target, filename, total_size, title=None, description=''):
+        """Start a resumable upload after validating the file type, declared size and storage quota"""
+        if target not in self.TARGETS:
+            raise Exception('Unknown upload target')
+
+        if target == 'media':
+            media_type = media_service.get_file_type(filename)
+            if not media_type or not media_service.allowed_file(filename, media_type):
+                raise Exception('File type not allowed')
+        elif not media_service.allowed_file(filename, 'portfolio'):
+            raise Exception('File type not allowed')
+
+        max_size = current_app.config['UPLOAD_MAX_SIZE']
+        if not total_size or total_size <= 0:
+            raise Exception('File size is required')
+        if total_size > max_size:
+            raise Exception(f'File is larger than the {max_size // (1024 * 1024)} MB limit')
+        if target == 'media':
+            # Fail before the bytes are sent; completing the upload consumes the quota
+            quota_service.check(db.session.get(User, user_id), 'media_storage_gb', total_size)
+
+        session = UploadSession(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            target=target,
+            filename=filename,
+            title=title,
+            description=description,
+            total_size=total_size,
+            received_size=0,
+            status='uploading',
+            expires_at=self._expiry()
+        )
+
+        part_path = self.part_path(session.id)
+        os.makedirs(os.path.dirname(part_path), exist_ok=True)
+        open(part_path, 'wb').close()
+
+        db.session.add(session)
+        db.session.commit()
+        return session
+
+    @staticmethod
+    def get_session(session_id, user_id):
+        return UploadSession.query.filter_by(id=session_id, user_id=user_id).first()
+
+    def write_chunk(self, session_id, user_id, offset, stream):
+        """
+        Write the request body at offset, which must equal the bytes received so far.
+
+        The session row is locked only to validate the offset and again to
+        record the new size; the body is streamed straight into the partial
+        file with no transaction open, so a slow client holds no lock or
+        pooled connection. Of two requests racing at the same offset, only
+        the first to re-lock records its bytes; anything past the recorded
+        size is truncated by the next write. Bytes written before a dropped
+        connection are kept, so the client resumes from whatever GET reports
+        as received.
+        """
+        session = self._locked_session(session_id, user_id, offset)
+        total_size = session.total_size
+        db.session.commit()  # Release the row lock before reading the body
+
+        hasher = self._hasher(session_id, offset)
+        written = 0
+        error = None
+        try:
+            with open(self.part_path(session_id), 'r+b') as out:
+                out.seek(offset)
+                out.truncate()  # Drop any bytes past the last recorded offset
+                for chunk in iter(lambda: stream.read(self.READ_SIZE), b''):
+                    if offset + written + len(chunk) > total_size:
+                        raise Exception('Chunk exceeds the declared file size')
+                    out.write(chunk)
+                    hasher.update(chunk)
+                    written += len(chunk)
+        except Exception as e:
+            error = e
+
+        session = self._record(session_id, user_id, offset, written, hasher)
+        if error:
+            raise error
+        return session
+
+    def _locked_session(self, session_id, user_id, offset):
+        """The session row, locked FOR UPDATE, if it is still uploading at offset"""
+        session = UploadSession.query.filter_by(
+            id=session_id, user_id=user_id
+        ).with_for_update().first()
+        if not session or session.status != 'uploading':
+            raise Exception('Upload not found')
+        if offset != session.received_size:
+            raise Exception(f'Offset mismatch: expected {session.received_size}')
+        return session
+
+    def _record(self, session_id, user_id, offset, written, hasher):
+        """Re-lock the session and, if no other request moved its offset, record the bytes written"""
+        try:
+            session = self._locked_session(session_id, user_id, offset)
+        except Exception:
+            db.session.rollback()
+            # A racing request may have overwritten received bytes; re-hash from disk next time
+            with self._lock:
+                self._hashers.pop(session_id, None)
+            raise
+        session.received_size = offset + written
+        session.expires_at = self._expiry()
+        db.session.commit()
+
+        self._cache_hasher(session_id, session.received_size, hasher)
+        return session
+
+    def complete(self, session_id, user_id):
+        """Move a fully received upload into the blob store and create its Media/Portfolio row"""
+        session = UploadSession.query.filter_by(
+            id=session_id, user_id=user_id
+        ).with_for_update().first()
+        if not session:
+            raise Exception('Upload not found')
+        if session.status == 'completed':
+            return session
+        if session.status == 'failed':
+            raise Exception('Upload failed, please upload the file again')
+        if not session.is_complete:
+            raise Exception(f'Upload incomplete: {session.received_size} of {session.total_size} bytes received')
+
+        content_hash = self._hasher(session.id, session.received_size).hexdigest()
+        ext = os.path.splitext(session.filename)[1]
+        file_path = None
+        is_duplicate = False
+        try:
+            file_path, content_hash, _, is_duplicate = blob_store.commit_file(
+                self.part_path(session.id), content_hash, session.total_size, ext
+            )
+            session.status = 'completed'
+            create = media_service.create_media if session.target == 'media' else portfolio_service.create_portfolio
+            record = create(
+                user_id, file_path, session.filename, content_hash, is_duplicate,
+                title=session.title, description=session.description
+            )
+        except Exception:
+            db.session.rollback()
+            if file_path and not is_duplicate:
+                blob_store.remove_files(file_path)
+            if not os.path.exists(self.part_path(session_id)):
+                # commit_file consumed the partial file, so the upload cannot be completed again
+                UploadSession.query.filter_by(id=session_id).update(
+                    {'status': 'failed', 'updated_at': datetime.utcnow()}, synchronize_session=False
+                )
+                db.session.commit()
+            raise
+
+        session.record_id = record.id
+        db.session.commit()
+        return session
+
+    def abort(self, session_id, user_id):
+        """Cancel an unfinished upload and delete its partial file"""
+        session = self.get_session(session_id, user_id)
+        if not session:
+            return False
+        self._discard(session)
+        db.session.commit()
+        return True
+
+    def purge_expired(self):
+        """Delete sessions (and partial files) whose TTL has passed"""
+        expired = UploadSession.query.filter(UploadSession.expires_at < datetime.utcnow()).all()
+        for session in expired:
+            self._discard(session)
+        db.session.commit()
+        return len(expired)
+
+    def _discard(self, session):
+        if session.status == 'uploading':
+            try:
+                os.remove(self.part_path(session.id))
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._hashers.pop(session.id, None)
+        db.session.delete(session)
+
+    def _hasher(self, session_id, received_size):
+        """SHA-256 state for the first received_size bytes, re-hashing the partial file on a cache miss"""
+        with self._lock:
+            cached = self._hashers.pop(session_id, None)
+        if cached and cached[0] == received_size:
+            return cached[1]
+
+        hasher = hashlib.sha256()
+        remaining = received_size
+        with open(self.part_path(session_id), 'rb') as part:
+            while remaining:
+                chunk = part.read(min(self.READ_SIZE, remaining))
+                if not chunk:
+                    raise Exception('Partial upload file is shorter than recorded')
+                hasher.update(chunk)
+                remaining -= len(chunk)
+        return hasher
+
+    def _cache_hasher(self, session_id, received_size, hasher):
+        """Keep the running hash for the next chunk, dropping entries idle longer than the session TTL"""
+        now = time.monotonic()
+        idle_limit = current_app.config['UPLOAD_SESSION_TTL']
+        with self._lock:
+            self._hashers[session_id] = (received_size, hasher, now)
+            for stale_id in [key for key, entry in self._hashers.items() if now - entry[2] > idle_limit]:
+                del self._hashers[stale_id]
+
+    @staticmethod
+    def _expiry():
+        return datetime.utcnow() + timedelta(seconds=current_app.config['UPLOAD_SESSION_TTL'])
+
+
+upload_service = UploadService()
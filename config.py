@@ -13,15 +13,90 @@ class Config:
     SESSION_COOKIE_SECURE = False
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
+    USER_PRINCIPAL_CACHE_TTL = int(os.environ.get('USER_PRINCIPAL_CACHE_TTL', 5))  # seconds the logged-in User is reused per process, 0 disables
     
     # Facebook OAuth
     FACEBOOK_APP_ID = os.environ.get('FACEBOOK_APP_ID')
     FACEBOOK_APP_SECRET = os.environ.get('FACEBOOK_APP_SECRET')
     FACEBOOK_REDIRECT_URI = os.environ.get('FACEBOOK_REDIRECT_URI', '' 'https://fictional-succotash-7664rj5wjrj2xj65-5000.app.github.dev/auth/facebook/callback')
     
+    # Graph API HTTP client (shared keep-alive pool)
+    FACEBOOK_CONNECT_TIMEOUT = float(os.environ.get('FACEBOOK_CONNECT_TIMEOUT', 5))  # seconds
+    FACEBOOK_READ_TIMEOUT = float(os.environ.get('FACEBOOK_READ_TIMEOUT', 30))  # seconds
+    FACEBOOK_POOL_SIZE = int(os.environ.get('FACEBOOK_POOL_SIZE', 20))  # Keep-alive connections per host
+    FACEBOOK_MAX_RETRIES = int(os.environ.get('FACEBOOK_MAX_RETRIES', 3))
+    FACEBOOK_RETRY_BACKOFF = float(os.environ.get('FACEBOOK_RETRY_BACKOFF', 0.5))  # seconds, doubled per attempt
+    
     # Database
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///socials.db'
 
+    # Background task queue (app/services/task_queue.py)
+    TASK_QUEUE_THREADS = int(os.environ.get('TASK_QUEUE_THREADS', 4))
+    TASK_QUEUE_PROCESSES = int(os.environ.get('TASK_QUEUE_PROCESSES', os.cpu_count() or 2))  # CPU-bound work
+    TASK_QUEUE_EAGER = False  # Run tasks inline instead of in the background
+    PORTFOLIO_EXTRACTION_TIMEOUT = int(os.environ.get('PORTFOLIO_EXTRACTION_TIMEOUT', 300))  # seconds
+    PORTFOLIO_MAX_EXTRACTED_CHARS = int(os.environ.get('PORTFOLIO_MAX_EXTRACTED_CHARS', 0)) or None  # None = whole document
+    PORTFOLIO_CHUNK_CHARS = int(os.environ.get('PORTFOLIO_CHUNK_CHARS', 600))  # target size of an indexed passage
+    PORTFOLIO_CHUNK_TERMS = int(os.environ.get('PORTFOLIO_CHUNK_TERMS', 64))  # TF-IDF terms kept per passage
+    PORTFOLIO_CONTEXT_CHARS = int(os.environ.get('PORTFOLIO_CONTEXT_CHARS', 2000))  # portfolio text sent per AI prompt
+    
+    # Chunked, resumable uploads (/uploads)
+    UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', 5 * 1024 * 1024))  # Suggested chunk size for clients
+    UPLOAD_MAX_SIZE = int(os.environ.get('UPLOAD_MAX_SIZE', 2 * 1024 * 1024 * 1024))  # Per-file limit for chunked uploads
+    UPLOAD_SESSION_TTL = int(os.environ.get('UPLOAD_SESSION_TTL', 24 * 3600))  # seconds before an unfinished upload is purged
+    
+    # Serving uploads (/media/<id>/file): 'sendfile' streams from the app with Range/ETag support,
+    # 'x-accel' hands off to nginx (internal location at MEDIA_ACCEL_PREFIX aliased to UPLOAD_FOLDER),
+    # 'x-sendfile' hands off to Apache/lighttpd with the absolute path
+    MEDIA_SERVE_MODE = os.environ.get('MEDIA_SERVE_MODE', 'sendfile')
+    MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-uploads/')
+    MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 7 * 24 * 3600))  # seconds, private cache
+    
+    # Media derivatives: name -> (max width, max height), generated in the background after upload
+    MEDIA_DERIVATIVE_SIZES = {
+        'thumb': (200, 200),       # Media grid / post picker
+        'preview': (800, 800),     # Media detail page
+        'facebook': (2048, 2048),  # Largest size Facebook keeps for feed photos
+    }
+    MEDIA_DERIVATIVE_QUALITY = int(os.environ.get('MEDIA_DERIVATIVE_QUALITY', 85))  # JPEG quality
+    MEDIA_PROCESSING_TIMEOUT = int(os.environ.get('MEDIA_PROCESSING_TIMEOUT', 120))  # seconds
+    
+    # Video probing / poster frames: point these at a bundled static build (e.g. ./bin/ffmpeg) or leave on PATH
+    FFMPEG_BINARY = os.environ.get('FFMPEG_BINARY', 'ffmpeg')
+    FFPROBE_BINARY = os.environ.get('FFPROBE_BINARY', 'ffprobe')
+    VIDEO_POSTER_OFFSET = float(os.environ.get('VIDEO_POSTER_OFFSET', 1.0))  # seconds into the video
+    
+    # Billing
+    PLAN_CATALOG_TTL = int(os.environ.get('PLAN_CATALOG_TTL', 300))  # seconds plans stay cached per process
+    
+    # Dashboard
+    DASHBOARD_STATS_CACHE_TTL = int(os.environ.get('DASHBOARD_STATS_CACHE_TTL', 30))  # seconds
+    
+    # Scheduled post publisher (worker.py)
+    PUBLISHER_BATCH_SIZE = int(os.environ.get('PUBLISHER_BATCH_SIZE', 100))  # Rows claimed per poll
+    PUBLISHER_MAX_WORKERS = int(os.environ.get('PUBLISHER_MAX_WORKERS', 20))  # Concurrent Graph API calls
+    PUBLISHER_POLL_INTERVAL = int(os.environ.get('PUBLISHER_POLL_INTERVAL', 15))  # seconds
+    PUBLISHER_MAX_RETRIES = int(os.environ.get('PUBLISHER_MAX_RETRIES', 3))
+    PUBLISHER_RETRY_DELAY = int(os.environ.get('PUBLISHER_RETRY_DELAY', 300))  # seconds between attempts
+    PUBLISHER_CLAIM_TIMEOUT = int(os.environ.get('PUBLISHER_CLAIM_TIMEOUT', 600))  # release stale claims after (seconds)
+    
+    # AI generation (app/services/ai_executor.py)
+    AI_MAX_CONCURRENCY = int(os.environ.get('AI_MAX_CONCURRENCY', 32))  # Anthropic calls in flight per process
+    AI_MAX_CONCURRENCY_PER_USER = int(os.environ.get('AI_MAX_CONCURRENCY_PER_USER', 10))
+    AI_QUEUE_TIMEOUT = int(os.environ.get('AI_QUEUE_TIMEOUT', 30))  # seconds to wait for a free slot
+    AI_MAX_POSTS_PER_REQUEST = int(os.environ.get('AI_MAX_POSTS_PER_REQUEST', 10))
+    AI_CACHE_TTL = int(os.environ.get('AI_CACHE_TTL', 7 * 24 * 3600))  # seconds improve/hashtag/caption responses are reused
+    AI_CACHE_MAX_ENTRIES = int(os.environ.get('AI_CACHE_MAX_ENTRIES', 1000))  # In-process LRU size
+    ANTHROPIC_CONNECT_TIMEOUT = float(os.environ.get('ANTHROPIC_CONNECT_TIMEOUT', 5))  # seconds
+    ANTHROPIC_READ_TIMEOUT = float(os.environ.get('ANTHROPIC_READ_TIMEOUT', 60))  # seconds per API call
+    ANTHROPIC_MAX_RETRIES = int(os.environ.get('ANTHROPIC_MAX_RETRIES', 2))  # SDK retries on 429/5xx and connection errors
+    
+    # Multi-page publishing (one post to many pages)
+    PUBLISH_FANOUT_MAX_WORKERS = int(os.environ.get('PUBLISH_FANOUT_MAX_WORKERS', 50))  # Concurrent page publishes per post
+    
+    # Analytics sync scheduler (worker.py analytics-scheduler)
+    ANALYTICS_SCHEDULER_POLL_INTERVAL = int(os.environ.get('ANALYTICS_SCHEDULER_POLL_INTERVAL', 30))  # seconds
+
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
@@ -38,6 +113,7 @@ class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    TASK_QUEUE_EAGER = True
 
 config = {
     'development': DevelopmentConfig,
@@ -0,0 +1,59 @@
+"""Add daily and hourly engagement rollup tables
+
+Revision ID: 3b7f2c9d41a8
+Revises: da3a52e3c5d6
+Create Date: 2026-10-18 09:12:40.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7f2c9d41a8'
+down_revision = 'da3a52e3c5d6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_engagement',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('likes', sa.Integer(), nullable=False),
+        sa.Column('comments', sa.Integer(), nullable=False),
+        sa.Column('shares', sa.Integer(), nullable=False),
+        sa.Column('reach', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'date', name='uq_daily_engagement_user_date')
+    )
+    with op.batch_alter_table('daily_engagement', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_daily_engagement_user_id'), ['user_id'], unique=False)
+
+    op.create_table('hourly_engagement',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('hour', sa.Integer(), nullable=False),
+        sa.Column('posts', sa.Integer(), nullable=False),
+        sa.Column('engagement', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'hour', name='uq_hourly_engagement_user_hour')
+    )
+    with op.batch_alter_table('hourly_engagement', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_hourly_engagement_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('hourly_engagement', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_hourly_engagement_user_id'))
+
+    op.drop_table('hourly_engagement')
+    with op.batch_alter_table('daily_engagement', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_daily_engagement_user_id'))
+
+    op.drop_table('daily_engagement')
@@ -0,0 +1,28 @@
+"""Add composite indexes for media listing
+
+Revision ID: 4d8b6a1e9c37
+Revises: f1a7d93b2e60
+Create Date: 2026-10-18 14:58:31.640112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d8b6a1e9c37'
+down_revision = 'f1a7d93b2e60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('media', schema=None) as batch_op:
+        batch_op.create_index('ix_media_user_created', ['user_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_media_user_type_created', ['user_id', 'media_type', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('media', schema=None) as batch_op:
+        batch_op.drop_index('ix_media_user_type_created')
+        batch_op.drop_index('ix_media_user_created')
@@ -0,0 +1,54 @@
+"""Add content-addressed blob store
+
+Revision ID: 8e41d0b7c5f2
+Revises: 3b7f2c9d41a8
+Create Date: 2026-10-18 11:02:17.530914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e41d0b7c5f2'
+down_revision = '3b7f2c9d41a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('blobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('file_path', sa.String(length=500), nullable=False),
+        sa.Column('file_size', sa.BigInteger(), nullable=True),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('blobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_blobs_content_hash'), ['content_hash'], unique=True)
+
+    with op.batch_alter_table('media', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_media_content_hash'), ['content_hash'], unique=False)
+
+    with op.batch_alter_table('portfolios', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+        batch_op.create_index(batch_op.f('ix_portfolios_content_hash'), ['content_hash'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('portfolios', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_portfolios_content_hash'))
+        batch_op.drop_column('content_hash')
+
+    with op.batch_alter_table('media', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_media_content_hash'))
+        batch_op.drop_column('content_hash')
+
+    with op.batch_alter_table('blobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_blobs_content_hash'))
+
+    op.drop_table('blobs')
@@ -0,0 +1,42 @@
+"""Add composite indexes for per-user status queries
+
+Revision ID: 9a3e5c7d1f24
+Revises: 4d8b6a1e9c37
+Create Date: 2026-10-18 15:37:52.904417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a3e5c7d1f24'
+down_revision = '4d8b6a1e9c37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.create_index('ix_posts_user_created', ['user_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_posts_user_status_created', ['user_id', 'status', 'created_at'], unique=False)
+
+    with op.batch_alter_table('scheduled_posts', schema=None) as batch_op:
+        batch_op.create_index('ix_scheduled_posts_user_status_scheduled', ['user_id', 'publish_status', 'scheduled_at'], unique=False)
+        batch_op.create_index('ix_scheduled_posts_status_scheduled', ['publish_status', 'scheduled_at'], unique=False)
+
+    with op.batch_alter_table('subscriptions', schema=None) as batch_op:
+        batch_op.create_index('ix_subscriptions_user_status', ['user_id', 'status'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('subscriptions', schema=None) as batch_op:
+        batch_op.drop_index('ix_subscriptions_user_status')
+
+    with op.batch_alter_table('scheduled_posts', schema=None) as batch_op:
+        batch_op.drop_index('ix_scheduled_posts_status_scheduled')
+        batch_op.drop_index('ix_scheduled_posts_user_status_scheduled')
+
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_index('ix_posts_user_status_created')
+        batch_op.drop_index('ix_posts_user_created')
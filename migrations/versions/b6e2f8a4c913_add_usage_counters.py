@@ -0,0 +1,65 @@
+"""Add usage counters for plan quotas
+
+Revision ID: b6e2f8a4c913
+Revises: 9a3e5c7d1f24
+Create Date: 2026-10-18 16:52:31.417905
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e2f8a4c913'
+down_revision = '9a3e5c7d1f24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    usage_counters = op.create_table('usage_counters',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('metric', sa.String(length=50), nullable=False),
+        sa.Column('period', sa.String(length=7), nullable=False),
+        sa.Column('used', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'metric', 'period', name='uq_usage_counters_user_metric_period')
+    )
+    with op.batch_alter_table('usage_counters', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_usage_counters_user_id'), ['user_id'], unique=False)
+
+    # Seed counters from existing rows so current usage counts against the limits
+    now = datetime.utcnow()
+    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    posts = sa.table('posts', sa.column('user_id'), sa.column('created_at'))
+    scheduled = sa.table('scheduled_posts', sa.column('user_id'), sa.column('publish_status'))
+    media = sa.table('media', sa.column('user_id'), sa.column('file_size'))
+
+    connection = op.get_bind()
+    sources = [
+        ('posts_per_month', now.strftime('%Y-%m'),
+         sa.select(posts.c.user_id, sa.func.count()).where(
+             posts.c.created_at >= month_start).group_by(posts.c.user_id)),
+        ('scheduled_posts', 'total',
+         sa.select(scheduled.c.user_id, sa.func.count()).where(
+             scheduled.c.publish_status.in_(('scheduled', 'publishing'))).group_by(scheduled.c.user_id)),
+        ('media_storage_gb', 'total',
+         sa.select(media.c.user_id, sa.func.coalesce(sa.func.sum(media.c.file_size), 0)).group_by(media.c.user_id)),
+    ]
+    rows = []
+    for metric, period, query in sources:
+        for user_id, used in connection.execute(query):
+            rows.append({'user_id': user_id, 'metric': metric, 'period': period, 'used': int(used), 'updated_at': now})
+    if rows:
+        op.bulk_insert(usage_counters, rows)
+
+
+def downgrade():
+    with op.batch_alter_table('usage_counters', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_usage_counters_user_id'))
+
+    op.drop_table('usage_counters')
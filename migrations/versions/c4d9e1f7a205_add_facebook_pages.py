@@ -0,0 +1,87 @@
+"""Move users.facebook_pages JSON into a facebook_pages table
+
+Revision ID: c4d9e1f7a205
+Revises: b6e2f8a4c913
+Create Date: 2026-10-18 17:26:44.518032
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d9e1f7a205'
+down_revision = 'b6e2f8a4c913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    facebook_pages = op.create_table('facebook_pages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('page_id', sa.String(length=255), nullable=False),
+        sa.Column('name', sa.String(length=255), nullable=True),
+        sa.Column('picture_url', sa.String(length=500), nullable=True),
+        sa.Column('access_token', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'page_id', name='uq_facebook_pages_user_page')
+    )
+    with op.batch_alter_table('facebook_pages', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_facebook_pages_user_id'), ['user_id'], unique=False)
+
+    # Backfill one row per page from the stored /me/accounts responses
+    users = sa.table('users', sa.column('id', sa.Integer()), sa.column('facebook_pages', sa.JSON()))
+    now = datetime.utcnow()
+    rows = []
+    for user_id, pages in op.get_bind().execute(sa.select(users.c.id, users.c.facebook_pages)):
+        seen = set()
+        for page in pages or []:
+            page_id = page.get('id')
+            if not page_id or page_id in seen:
+                continue
+            seen.add(page_id)
+            rows.append({
+                'user_id': user_id,
+                'page_id': page_id,
+                'name': page.get('name'),
+                'picture_url': ((page.get('picture') or {}).get('data') or {}).get('url'),
+                'access_token': page.get('access_token'),
+                'created_at': now,
+                'updated_at': now
+            })
+    if rows:
+        op.bulk_insert(facebook_pages, rows)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('facebook_pages')
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('facebook_pages', sa.JSON(), nullable=True))
+
+    users = sa.table('users', sa.column('id', sa.Integer()), sa.column('facebook_pages', sa.JSON()))
+    pages = sa.table('facebook_pages', sa.column('user_id'), sa.column('page_id'), sa.column('name'),
+                     sa.column('picture_url'), sa.column('access_token'))
+    connection = op.get_bind()
+    by_user = {}
+    for user_id, page_id, name, picture_url, access_token in connection.execute(
+            sa.select(pages.c.user_id, pages.c.page_id, pages.c.name, pages.c.picture_url, pages.c.access_token)):
+        by_user.setdefault(user_id, []).append({
+            'id': page_id,
+            'name': name,
+            'picture': {'data': {'url': picture_url}} if picture_url else None,
+            'access_token': access_token
+        })
+    for user_id, user_pages in by_user.items():
+        connection.execute(users.update().where(users.c.id == user_id).values(facebook_pages=user_pages))
+
+    with op.batch_alter_table('facebook_pages', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_facebook_pages_user_id'))
+
+    op.drop_table('facebook_pages')
@@ -0,0 +1,31 @@
+"""Add media derivatives and processing status
+
+Revision ID: c52a9e3f7b16
+Revises: 8e41d0b7c5f2
+Create Date: 2026-10-18 12:20:45.872301
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c52a9e3f7b16'
+down_revision = '8e41d0b7c5f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('media', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('derivatives', sa.JSON(), nullable=True))
+        batch_op.add_column(sa.Column('processing_status', sa.String(length=50), nullable=True))
+
+    # Existing rows were processed synchronously at upload time
+    op.execute("UPDATE media SET processing_status = 'ready'")
+
+
+def downgrade():
+    with op.batch_alter_table('media', schema=None) as batch_op:
+        batch_op.drop_column('processing_status')
+        batch_op.drop_column('derivatives')
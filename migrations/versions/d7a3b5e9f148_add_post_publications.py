@@ -0,0 +1,49 @@
+"""Add per-page post publications
+
+Revision ID: d7a3b5e9f148
+Revises: c4d9e1f7a205
+Create Date: 2026-10-18 18:04:12.673390
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a3b5e9f148'
+down_revision = 'c4d9e1f7a205'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('post_publications',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('post_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('page_id', sa.String(length=255), nullable=False),
+        sa.Column('page_name', sa.String(length=255), nullable=True),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('facebook_post_id', sa.String(length=255), nullable=True),
+        sa.Column('facebook_url', sa.String(length=500), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('published_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['post_id'], ['posts.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('post_id', 'page_id', name='uq_post_publications_post_page')
+    )
+    with op.batch_alter_table('post_publications', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_post_publications_post_id'), ['post_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_post_publications_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('post_publications', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_post_publications_user_id'))
+        batch_op.drop_index(batch_op.f('ix_post_publications_post_id'))
+
+    op.drop_table('post_publications')
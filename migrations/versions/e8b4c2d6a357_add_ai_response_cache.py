@@ -0,0 +1,39 @@
+"""Add AI response cache
+
+Revision ID: e8b4c2d6a357
+Revises: d7a3b5e9f148
+Create Date: 2026-10-18 19:12:40.381526
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8b4c2d6a357'
+down_revision = 'd7a3b5e9f148'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ai_response_cache',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('cache_key', sa.String(length=64), nullable=False),
+        sa.Column('method', sa.String(length=50), nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=False),
+        sa.Column('response', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('cache_key')
+    )
+    with op.batch_alter_table('ai_response_cache', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_ai_response_cache_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('ai_response_cache', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_ai_response_cache_expires_at'))
+
+    op.drop_table('ai_response_cache')
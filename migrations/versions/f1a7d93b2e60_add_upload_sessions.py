@@ -0,0 +1,47 @@
+"""Add resumable upload sessions
+
+Revision ID: f1a7d93b2e60
+Revises: c52a9e3f7b16
+Create Date: 2026-10-18 13:41:09.226187
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a7d93b2e60'
+down_revision = 'c52a9e3f7b16'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('upload_sessions',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('target', sa.String(length=50), nullable=False),
+        sa.Column('filename', sa.String(length=255), nullable=False),
+        sa.Column('title', sa.String(length=255), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('total_size', sa.BigInteger(), nullable=False),
+        sa.Column('received_size', sa.BigInteger(), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('record_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('upload_sessions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_upload_sessions_expires_at'), ['expires_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_upload_sessions_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('upload_sessions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_upload_sessions_user_id'))
+        batch_op.drop_index(batch_op.f('ix_upload_sessions_expires_at'))
+
+    op.drop_table('upload_sessions')
@@ -0,0 +1,40 @@
+"""Add portfolio chunk index
+
+Revision ID: f3c7a1d9b482
+Revises: e8b4c2d6a357
+Create Date: 2026-10-18 20:41:07.215394
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c7a1d9b482'
+down_revision = 'e8b4c2d6a357'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing portfolios are indexed the first time posts are generated from them
+    op.create_table('portfolio_chunks',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('portfolio_id', sa.Integer(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('terms', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['portfolio_id'], ['portfolios.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('portfolio_id', 'position', name='uq_portfolio_chunks_portfolio_position')
+    )
+    with op.batch_alter_table('portfolio_chunks', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_portfolio_chunks_portfolio_id'), ['portfolio_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('portfolio_chunks', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_portfolio_chunks_portfolio_id'))
+
+    op.drop_table('portfolio_chunks')
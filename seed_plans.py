@@ -5,6 +5,7 @@ Run with: python seed_plans.py
 
 from app import create_app, db
 from app.models import Plan
+from app.services.plan_catalog import plan_catalog
 
 def seed_plans():
     """Create default subscription plans"""
@@ -131,6 +132,7 @@ def seed_plans():
             print(f"  ✓ Added {plan.display_name} plan")
         
         db.session.commit()
+        plan_catalog.invalidate()  # Other processes refresh after PLAN_CATALOG_TTL
         print("\n✅ All plans created successfully!")
         
         # Print plan IDs for Stripe setup
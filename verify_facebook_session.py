@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Verification script for the pooled FacebookService HTTP session
+Runs a local stub Graph API server and measures the latency saved per call
+by reusing keep-alive connections, then checks retry and timeout behaviour
+"""
+
+import sys
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from app.services.facebook_service import FacebookService
+
+# Simulated cost of opening a new connection (TCP + TLS handshake to graph.facebook.com)
+HANDSHAKE_DELAY = 0.03
+CALLS = 20
+
+
+class StubGraphHandler(BaseHTTPRequestHandler):
+    """Minimal Graph API stub: /me, /flaky (503 once), /throttled (code 4 once), /slow"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    failures = {}
+    lock = threading.Lock()
+
+    def setup(self):
+        time.sleep(HANDSHAKE_DELAY)  # Paid once per connection, not per request
+        super().setup()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _fail_once(self, key):
+        with self.lock:
+            if not self.failures.get(key):
+                self.failures[key] = True
+                return True
+        return False
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path == '/flaky' and self._fail_once('flaky'):
+            return self._send(503, {'error': {'message': 'Service unavailable', 'code': 2}})
+        if path == '/throttled' and self._fail_once('throttled'):
+            return self._send(400, {'error': {'message': 'Application request limit reached', 'code': 4}})
+        if path == '/slow':
+            time.sleep(2)
+        self._send(200, {'id': '123', 'name': 'Stub'})
+
+
+def start_stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubGraphHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def test_latency_saved(base_url):
+    """Compare per-call latency of one-off requests vs the pooled session"""
+    print("\n✅ Measuring keep-alive latency...")
+
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        requests.get(f'{base_url}/me', timeout=5).json()
+    unpooled = (time.perf_counter() - start) / CALLS
+
+    service = FacebookService()
+    service._get(f'{base_url}/me')  # Warm the pool
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        service._get(f'{base_url}/me').json()
+    pooled = (time.perf_counter() - start) / CALLS
+
+    print(f"  Unpooled: {unpooled * 1000:.1f} ms/call")
+    print(f"  Pooled:   {pooled * 1000:.1f} ms/call")
+    print(f"  Saved:    {(unpooled - pooled) * 1000:.1f} ms/call")
+    return pooled < unpooled
+
+
+def test_retries(base_url):
+    """5xx responses and Graph rate-limit errors are retried with backoff"""
+    print("\n✅ Testing retries...")
+    service = FacebookService()
+    service._settings = {'FACEBOOK_RETRY_BACKOFF': 0.01}
+
+    ok = True
+    for path in ('/flaky', '/throttled'):
+        response = service._get(f'{base_url}{path}')
+        if response.status_code == 200:
+            print(f"  ✓ {path} succeeded after retry")
+        else:
+            print(f"  ✗ {path} returned {response.status_code}")
+            ok = False
+    return ok
+
+
+def test_timeout(base_url):
+    """A hung socket raises instead of blocking the worker"""
+    print("\n✅ Testing read timeout...")
+    service = FacebookService()
+    service._settings = {'FACEBOOK_READ_TIMEOUT': 0.5, 'FACEBOOK_MAX_RETRIES': 0}
+    try:
+        service._get(f'{base_url}/slow')
+    except requests.exceptions.Timeout:
+        print("  ✓ Slow response timed out")
+        return True
+    print("  ✗ Slow response did not time out")
+    return False
+
+
+def main():
+    server, base_url = start_stub_server()
+    try:
+        results = [
+            test_latency_saved(base_url),
+            test_retries(base_url),
+            test_timeout(base_url),
+        ]
+    finally:
+        server.shutdown()
+
+    if all(results):
+        print("\n✅ All FacebookService session checks passed")
+        return 0
+    print("\n✗ Some FacebookService session checks failed")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Verification script for plan limits
+Checks that -1 ("Unlimited" in seed_plans.py) never blocks a user, and that a
+finite limit still does, on a temporary SQLite database
+"""
+
+import os
+import sys
+import tempfile
+
+UNLIMITED = {
+    'pages': -1,
+    'posts_per_month': -1,
+    'scheduled_posts': -1,
+    'media_storage_gb': -1,
+    'ai_captions_per_month': -1,
+}
+
+LIMITED = {
+    'pages': 1,
+    'posts_per_month': 2,
+    'scheduled_posts': 2,
+    'media_storage_gb': 0.001,
+    'ai_captions_per_month': 0,
+}
+
+# A large amount of each metric, in counter units
+AMOUNTS = {
+    'posts_per_month': 1000,
+    'scheduled_posts': 1000,
+    'media_storage_gb': 500 * 1024 ** 3,
+    'ai_captions_per_month': 1000,
+}
+
+
+def make_user(db, user_id, plan_name, features):
+    from app.models import User, Plan, Subscription
+
+    plan = Plan(name=plan_name, display_name=plan_name.title(), slug=plan_name, features=features)
+    db.session.add(plan)
+    db.session.flush()
+    user = User(id=user_id, facebook_id=f'verify-{user_id}', email=f'verify{user_id}@example.com',
+                name=f'User {user_id}', access_token='verify')
+    db.session.add(user)
+    db.session.flush()
+    subscription = Subscription(user_id=user.id, plan_id=plan.id, status='active')
+    db.session.add(subscription)
+    db.session.flush()
+    user.current_subscription_id = subscription.id
+    db.session.commit()
+    return user
+
+
+def test_unlimited_plan(db, user):
+    """-1 limits are unlimited for consume(), check() and the page limit"""
+    from app.services.quota_service import quota_service, QuotaExceeded
+
+    print("\n✅ Testing Unlimited (-1) Plan...")
+
+    if user.entitlements.limit('pages') is not None:
+        print(f"  ✗ Page limit is {user.entitlements.limit('pages')}, expected unlimited")
+        return False
+    print("  ✓ Page limit is unlimited")
+
+    for metric, amount in AMOUNTS.items():
+        try:
+            quota_service.check(user, metric, amount)
+            quota_service.consume(user, metric, amount)
+            db.session.commit()
+        except QuotaExceeded as e:
+            db.session.rollback()
+            print(f"  ✗ '{metric}' blocked: {e}")
+            return False
+        print(f"  ✓ '{metric}' allows {amount} (used {quota_service.get_usage(user.id, metric)})")
+
+    return True
+
+
+def test_limited_plan(db, user):
+    """Finite limits still raise QuotaExceeded"""
+    from app.services.quota_service import quota_service, QuotaExceeded
+
+    print("\n✅ Testing Limited Plan...")
+
+    if user.entitlements.limit('pages') != LIMITED['pages']:
+        print(f"  ✗ Page limit is {user.entitlements.limit('pages')}, expected {LIMITED['pages']}")
+        return False
+    print(f"  ✓ Page limit is {LIMITED['pages']}")
+
+    for metric, amount in AMOUNTS.items():
+        try:
+            quota_service.consume(user, metric, amount)
+            db.session.commit()
+        except QuotaExceeded:
+            db.session.rollback()
+            print(f"  ✓ '{metric}' blocks {amount}")
+            continue
+        print(f"  ✗ '{metric}' allowed {amount} past its limit")
+        return False
+
+    return True
+
+
+def main():
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'verify_plan_limits.db')
+
+    from app import create_app, db
+    from app.services.plan_catalog import plan_catalog
+    from app.services.principal_cache import principal_cache
+
+    app = create_app('development')
+    with app.app_context():
+        db.create_all()
+        plan_catalog.invalidate()
+        unlimited = make_user(db, 1, 'enterprise', UNLIMITED)
+        limited = make_user(db, 2, 'business', LIMITED)
+        principal_cache.invalidate(unlimited.id)
+        principal_cache.invalidate(limited.id)
+
+        results = []
+        for test, user in ((test_unlimited_plan, unlimited), (test_limited_plan, limited)):
+            try:
+                results.append(test(db, user))
+            except Exception as e:
+                print(f"✗ Test failed with error: {e}")
+                results.append(False)
+
+        db.session.remove()
+        db.engine.dispose()
+
+    print("\n" + "=" * 60)
+    if all(results):
+        print("✅ ALL PLAN LIMIT CHECKS PASSED")
+        return 0
+    print("❌ SOME PLAN LIMIT CHECKS FAILED")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
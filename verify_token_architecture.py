@@ -14,29 +14,38 @@ from datetime import datetime
 import json
 
 def test_database_schema():
-    """Verify User model has all required fields"""
+    """Verify User and FacebookPage models have all required fields"""
     print("\n✅ Testing Database Schema...")
     
     app = create_app()
     with app.app_context():
-        # Check if User table exists with proper columns
+        # Check if User and FacebookPage tables exist with proper columns
         inspector = db.inspect(db.engine)
-        columns = [c['name'] for c in inspector.get_columns('users')]
         
-        required_fields = [
-            'page_access_token',
-            'facebook_pages',
-            'selected_page_id',
-            'selected_page_name',
-            'access_token'
-        ]
+        required_fields = {
+            'users': [
+                'page_access_token',
+                'selected_page_id',
+                'selected_page_name',
+                'access_token'
+            ],
+            'facebook_pages': [
+                'page_id',
+                'access_token'
+            ]
+        }
         
-        for field in required_fields:
-            if field in columns:
-                print(f"  ✓ Column '{field}' exists")
-            else:
-                print(f"  ✗ Column '{field}' MISSING")
+        for table, fields in required_fields.items():
+            if not inspector.has_table(table):
+                print(f"  ✗ Table '{table}' MISSING")
                 return False
+            columns = [c['name'] for c in inspector.get_columns(table)]
+            for field in fields:
+                if field in columns:
+                    print(f"  ✓ Column '{table}.{field}' exists")
+                else:
+                    print(f"  ✗ Column '{table}.{field}' MISSING")
+                    return False
     
     return True
 
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+"""Background worker entry point
+
+Usage:
+    python worker.py publish           # Poll and publish due scheduled posts
+    python worker.py publish --once    # Publish a single batch and exit
+    python worker.py analytics         # Refresh PostAnalytics for every posted post
+    python worker.py analytics-scheduler  # Keep analytics fresh, re-pulling posts by age
+    python worker.py rollups           # Rebuild the engagement rollup tables from PostAnalytics
+    python worker.py extract           # Extract text for portfolios left unprocessed (e.g. after a restart)
+    python worker.py media             # Generate derivatives for media left unprocessed
+    python worker.py uploads           # Purge expired chunked uploads and their partial files
+    python worker.py ai-cache          # Purge expired AI response cache entries
+
+Several publish workers can run side by side; due rows are claimed with a
+conditional UPDATE (after row-level locks on PostgreSQL) so no post is
+published twice.
+"""
+
+import argparse
+import logging
+import os
+import time
+from app import create_app
+
+app = create_app(os.environ.get('FLASK_ENV', 'development'))
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+logger = logging.getLogger('worker')
+
+
+def run_publisher(once=False):
+    """Publish scheduled posts until interrupted"""
+    from app.services.publisher_service import publisher_service
+
+    with app.app_context():
+        interval = app.config['PUBLISHER_POLL_INTERVAL']
+        batch_size = app.config['PUBLISHER_BATCH_SIZE']
+        logger.info(f"Publisher started (batch={batch_size}, poll={interval}s)")
+
+        while True:
+            try:
+                summary = publisher_service.run_once()
+            except Exception as e:
+                logger.exception(f"Publisher batch failed: {e}")
+                from app import db
+                db.session.rollback()
+                summary = None
+
+            if once:
+                return summary
+
+            # A full batch means more rows are probably due - poll again immediately
+            claimed = summary['claimed'] if summary else 0
+            if claimed < batch_size:
+                time.sleep(interval)
+
+
+def run_analytics_sync():
+    """Refresh analytics for all posted posts using batched Graph API calls"""
+    from app.services.analytics_service import analytics_service
+
+    with app.app_context():
+        return analytics_service.sync_all()
+
+
+def run_rollup_rebuild():
+    """Backfill DailyEngagement/HourlyEngagement from existing PostAnalytics rows"""
+    from app.services.analytics_service import analytics_service
+
+    with app.app_context():
+        summary = analytics_service.rebuild_rollups()
+        logger.info(f"Rebuilt engagement rollups: {summary}")
+        return summary
+
+
+def run_pending_extractions():
+    """Process portfolios whose background extraction never finished"""
+    from app.models import Portfolio
+    from app.services.portfolio_service import portfolio_service
+
+    with app.app_context():
+        pending = [row.id for row in Portfolio.query.with_entities(Portfolio.id).filter(
+            Portfolio.status.in_(['uploaded', 'processing'])
+        ).all()]
+        for portfolio_id in pending:
+            status = portfolio_service.process_portfolio(portfolio_id)
+            logger.info(f"Portfolio {portfolio_id}: {status}")
+        return len(pending)
+
+
+def run_pending_media():
+    """Process media whose background derivative generation never finished"""
+    from app.models import Media
+    from app.services.media_service import media_service
+
+    with app.app_context():
+        pending = [row.id for row in Media.query.with_entities(Media.id).filter(
+            Media.processing_status.in_(['pending', 'processing'])
+        ).all()]
+        for media_id in pending:
+            status = media_service.process_media(media_id)
+            logger.info(f"Media {media_id}: {status}")
+        return len(pending)
+
+
+def run_upload_purge():
+    """Delete resumable upload sessions past UPLOAD_SESSION_TTL"""
+    from app.services.upload_service import upload_service
+
+    with app.app_context():
+        purged = upload_service.purge_expired()
+        logger.info(f"Purged {purged} expired upload sessions")
+        return purged
+
+
+def run_ai_cache_purge():
+    """Delete AI response cache rows past AI_CACHE_TTL"""
+    from app.services.ai_cache import ai_cache
+
+    with app.app_context():
+        purged = ai_cache.purge_expired()
+        logger.info(f"Purged {purged} expired AI cache entries: {ai_cache.stats()}")
+        return purged
+
+
+def run_analytics_scheduler(once=False):
+    """Continuously re-sync analytics for posts as they become due"""
+    from app import db
+    from app.services.analytics_service import AnalyticsSyncScheduler
+
+    with app.app_context():
+        scheduler = AnalyticsSyncScheduler()
+        interval = app.config['ANALYTICS_SCHEDULER_POLL_INTERVAL']
+        logger.info(f"Analytics scheduler started (poll={interval}s)")
+
+        while True:
+            try:
+                summary = scheduler.run_once()
+                metrics = scheduler.metrics()
+                lag = ' '.join(
+                    f"{name}_lag={tier['max_lag_seconds']}s" for name, tier in metrics['tiers'].items()
+                )
+                logger.info(
+                    f"analytics_sync synced={summary['synced']} errors={summary['errors']} "
+                    f"queue_depth={metrics['queue_depth']} overdue={metrics['overdue']} {lag}"
+                )
+            except Exception as e:
+                logger.exception(f"Analytics scheduler cycle failed: {e}")
+                db.session.rollback()
+            finally:
+                db.session.remove()
+
+            if once:
+                return scheduler
+            time.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Socials background worker')
+    parser.add_argument('job', choices=['publish', 'analytics', 'analytics-scheduler', 'rollups', 'extract', 'media', 'uploads', 'ai-cache'], help='Job to run')
+    parser.add_argument('--once', action='store_true', help='Run a single batch and exit')
+    args = parser.parse_args()
+
+    if args.job == 'publish':
+        run_publisher(once=args.once)
+    elif args.job == 'analytics':
+        run_analytics_sync()
+    elif args.job == 'analytics-scheduler':
+        run_analytics_scheduler(once=args.once)
+    elif args.job == 'rollups':
+        run_rollup_rebuild()
+    elif args.job == 'extract':
+        run_pending_extractions()
+    elif args.job == 'media':
+        run_pending_media()
+    elif args.job == 'uploads':
+        run_upload_purge()
+    elif args.job == 'ai-cache':
+        run_ai_cache_purge()
+
+
+if __name__ == '__main__':
+    main()